@@ -0,0 +1,112 @@
+"""
+File Registry - In-memory index of generated CV files
+Lets /api/files answer without listing the filesystem: the index is built by
+one directory scan and then kept up to date as CVs are rendered or deleted.
+Changes made outside the app (e.g. files removed in the file manager) are
+caught by comparing the directory mtime, which costs a single stat per call.
+"""
+import os
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Union
+
+# Same layout as pdf_engine.py / generation.py
+BACKEND_DIR = Path(__file__).parent.parent.parent
+HTML_DIR = BACKEND_DIR / "output" / "html"
+
+
+class FileRegistry:
+    def __init__(self, directory: Path, suffix: str = ".html"):
+        self.directory = directory
+        self.suffix = suffix
+        self._entries: dict[str, tuple[float, dict]] = {}  # filename -> (mtime, info)
+        self._sorted: Optional[list[dict]] = None  # newest first, rebuilt lazily
+        self._loaded = False
+        self._dir_mtime: Optional[int] = None  # directory st_mtime_ns the index matches
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _stat_dir(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        """True if the index was never built or the directory changed behind our back."""
+        return not self._loaded or self._stat_dir() != self._dir_mtime
+
+    def rescan(self):
+        """Rebuild the index from disk (safe to run in a worker thread)."""
+        # Read the mtime before scanning: anything created mid-scan makes it stale again
+        dir_mtime = self._stat_dir()
+        entries = {}
+        try:
+            # One scandir pass: DirEntry carries the name/path (and on Windows the
+            # stat result) from the directory read - no Path objects, no glob
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix):
+                        continue
+                    try:
+                        if entry.is_file():
+                            entries[entry.name] = self._entry(entry.name, entry.path, entry.stat())
+                    except OSError as e:
+                        print(f"WARNING: Error reading file {entry.name}: {e}")
+        except FileNotFoundError:
+            pass
+        # Swap in the finished index in one step
+        self._entries = entries
+        self._sorted = None
+        self._dir_mtime = dir_mtime
+        self._loaded = True
+
+    @staticmethod
+    def _entry(filename: str, path: str, stat) -> tuple[float, dict]:
+        return (stat.st_mtime, {
+            "filename": filename,
+            "path": path,
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "size_kb": round(stat.st_size / 1024, 2)
+        })
+
+    def add(self, path: Union[str, Path]):
+        """Register a newly written (or rewritten) file."""
+        if not self._loaded:
+            return  # The first list() call scans the directory anyway
+        filepath = Path(path)
+        try:
+            self._entries[filepath.name] = self._entry(filepath.name, str(filepath), filepath.stat())
+            self._sorted = None
+            self._dir_mtime = self._stat_dir()  # Our own write - no rescan needed
+        except OSError as e:
+            print(f"WARNING: Could not register file {filepath.name}: {e}")
+
+    def remove(self, filename: str):
+        """Forget a deleted file."""
+        if self._entries.pop(filename, None) is not None:
+            self._sorted = None
+        if self._loaded:
+            self._dir_mtime = self._stat_dir()
+
+    def clear(self):
+        """Forget all files (after the output folder was wiped)."""
+        self._entries.clear()
+        self._sorted = []
+        self._dir_mtime = self._stat_dir()
+
+    def list(self) -> list[dict]:
+        """All registered files, newest first."""
+        if not self._loaded:
+            self.rescan()
+        if self._sorted is None:
+            self._sorted = [
+                info for _, info in sorted(self._entries.values(), key=lambda e: e[0], reverse=True)
+            ]
+        return self._sorted
+
+
+# Global registry of generated CV HTML files (one per CV)
+file_registry = FileRegistry(HTML_DIR)
@@ -2,6 +2,7 @@
 Enhanced Logging Configuration
 """
 import logging
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -62,7 +63,8 @@ app_logger = logging.getLogger("app")
 app_logger.addHandler(app_handler)
 app_logger.addHandler(console_handler)
 app_logger.addHandler(error_handler)
-app_logger.setLevel(logging.INFO)
+app_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+app_logger.propagate = False  # Own console handler; don't print twice via root
 
 # Configure error logger
 error_logger = logging.getLogger("error")
@@ -80,6 +82,12 @@ access_handler.setFormatter(simple_formatter)
 access_logger.addHandler(access_handler)
 access_logger.setLevel(logging.INFO)
 
+def set_log_level(level: str):
+    """Apply a LOG_LEVEL name (DEBUG, INFO, WARNING...) to the app logger and console."""
+    level = level.upper()
+    app_logger.setLevel(level)
+    console_handler.setLevel(level)
+
 def log_request(request, response_time: float = None):
     """Log API request."""
     log_data = {
@@ -5,12 +5,18 @@ Phase 5: Generates PDF using Playwright with image optimization.
 """
 
 import os
+import re
 import sys
 import base64
 import io
+import asyncio
+import subprocess
+import tempfile
 import datetime
+import functools
+import mmap
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 from PIL import Image
 import random
 
@@ -18,6 +24,7 @@ import random
 BACKEND_DIR = Path(__file__).parent.parent.parent
 OUTPUT_DIR = BACKEND_DIR / "output"
 TEMPLATES_DIR = BACKEND_DIR / "templates"
+JINJA_CACHE_DIR = BACKEND_DIR / ".jinja_cache"
 
 # Detect Vercel environment
 IS_VERCEL = os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV') is not None
@@ -27,12 +34,72 @@ if not IS_VERCEL:
     OUTPUT_DIR.mkdir(exist_ok=True)
     (OUTPUT_DIR / "pdf").mkdir(exist_ok=True)
     (OUTPUT_DIR / "html").mkdir(exist_ok=True)
+    JINJA_CACHE_DIR.mkdir(exist_ok=True)
+
+# Persist compiled template bytecode between restarts (not on Vercel - read-only filesystem)
+_BCC = None if IS_VERCEL else FileSystemBytecodeCache(directory=str(JINJA_CACHE_DIR), pattern="%s.cache")
+
+# Jinja2 environment is created once so compiled templates are reused across renders.
+# Templates do not change at runtime, so auto_reload is disabled to skip mtime checks.
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    auto_reload=False,
+    cache_size=400,
+    bytecode_cache=_BCC
+)
+
+
+# Sidebar palette shared by the HTML and PDF renders (and batch_service)
+SIDEBAR_COLORS = (
+    '#E3F2FD', '#D1EAED', '#D4E6F1', '#EBF5FB', # Blues
+    '#E8F5E9', '#DCE6D9', '#EAFAF1',            # Greens
+    '#FAF2D3', '#FDEBD0', '#E6DDCF',            # Warm
+    '#F4ECF7', '#E8DAEF', '#FADBD8',            # Rose/Purple
+    '#E5E7E9', '#EAEDED', '#F2F3F4', '#D7DBDD'  # Neutrals
+)
+
+# Playwright page.pdf() options - keep in sync with generate_pdf_script.py
+PDF_PRINT_OPTIONS = {
+    "format": "A4",
+    "print_background": True,
+    "prefer_css_page_size": True
+}
+
+# Assets only needed when the HTML is viewed in a browser (client-side "Download PDF"
+# button). Chromium would otherwise download the ~1MB html2pdf bundle before "load".
+_PREVIEW_ONLY_ASSETS_RE = re.compile(r'<script[^>]+src="[^"]*html2pdf[^"]*"[^>]*>\s*</script>', re.IGNORECASE)
+
+
+def strip_preview_assets(html_content: str) -> str:
+    """Remove preview-only remote assets from HTML destined for PDF printing."""
+    return _PREVIEW_ONLY_ASSETS_RE.sub("", html_content)
+
+
+@functools.lru_cache(maxsize=16)
+def _compress_cached(path: str, mtime: int, size: int, max_size: int, quality: int) -> str:
+    """Downscale and JPEG-encode an image. mtime/size are only part of the cache key."""
+    with Image.open(path) as img:
+        # Convert to RGB if necessary (for PNG with transparency)
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+        
+        # Resize maintaining aspect ratio
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        
+        # Save to buffer as JPEG
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+        
+        # Encode to base64
+        img_b64 = base64.b64encode(buffer.getbuffer()).decode('ascii')
+        return f"data:image/jpeg;base64,{img_b64}"
 
 
 def compress_image_base64(image_path: str, max_size: int = 200, quality: int = 60) -> str:
     """
     Compress an image and return as base64 string.
     Used to reduce HTML file size for faster PDF generation.
+    Results are memoized per (path, mtime, size, max_size, quality).
     
     Args:
         image_path: Path to the original image
@@ -43,38 +110,134 @@ def compress_image_base64(image_path: str, max_size: int = 200, quality: int = 6
         Base64 encoded compressed image as data URI
     """
     try:
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary (for PNG with transparency)
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            
-            # Resize maintaining aspect ratio
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-            
-            # Save to buffer as JPEG
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
-            buffer.seek(0)
-            
-            # Encode to base64
-            img_b64 = base64.b64encode(buffer.read()).decode('utf-8')
-            return f"data:image/jpeg;base64,{img_b64}"
+        st = os.stat(image_path)
+        return _compress_cached(str(image_path), st.st_mtime_ns, st.st_size, max_size, quality)
     except Exception as e:
         print(f"WARNING: Image compression failed: {e}")
         # Fallback to original
         try:
-            with open(image_path, 'rb') as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                return f"data:image/jpeg;base64,{img_b64}"
+            return get_image_as_base64(image_path)
         except:
             return ""
 
 
+# Avatars are unique per task, so only a few entries are ever reused (the same
+# CV rendered as HTML and PDF, regenerate-pdf). Keep the caches small: each
+# entry is a full base64 data URI.
+@functools.lru_cache(maxsize=8)
+def _encode_cached(path: str, mtime: int, size: int) -> str:
+    """Read and base64-encode an image. mtime/size are only part of the cache key."""
+    if size == 0:
+        return "data:image/jpeg;base64,"
+    # mmap lets b64encode read the page-cached file directly instead of copying it into a bytes object
+    with open(path, 'rb') as img:
+        with mmap.mmap(img.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            img_b64 = base64.b64encode(mm).decode('ascii')
+    return f"data:image/jpeg;base64,{img_b64}"
+
+
+@functools.lru_cache(maxsize=8)
+def _embed_cached(path: str, mtime: int, size: int, max_size: int) -> str:
+    """Downscale if larger than max_size, else embed as-is. mtime/size are only part of the cache key."""
+    try:
+        with Image.open(path) as img:
+            oversized = max(img.size) > max_size
+        if oversized:
+            return _compress_cached(path, mtime, size, max_size, 85)
+    except Exception as e:
+        # Not something PIL can read (or re-encode) - embed the raw bytes as before
+        print(f"WARNING: Could not inspect image {path}: {e}")
+    return _encode_cached(path, mtime, size)
+
+
+def get_image_as_base64(image_path: str, max_size: int | None = None) -> str:
+    """
+    Return the image as a base64 data URI.
+    Results are memoized per (path, mtime, size) so overwritten images invalidate naturally.
+    
+    Args:
+        max_size: If set, images larger than this (px) are downscaled before encoding,
+                  so oversized uploads don't bloat the HTML. Smaller images are embedded as-is.
+    """
+    st = os.stat(image_path)
+    if max_size:
+        return _embed_cached(str(image_path), st.st_mtime_ns, st.st_size, max_size)
+    return _encode_cached(str(image_path), st.st_mtime_ns, st.st_size)
+
+
+def _build_cv_context(data_dict: dict, image_path: str | None, compress_images: bool = False, image_size: int = 100, sidebar_color: str = None) -> dict:
+    """
+    Build the Jinja2 context for the CV template.
+    
+    Args:
+        compress_images: If True, compress images for smaller file size (used for PDF)
+    """
+    # Prepare context
+    context = data_dict.copy()
+    
+    # Add PDF generation flag
+    context['is_pdf_generation'] = True
+    
+    if sidebar_color:
+         context['sidebar_color'] = sidebar_color
+    else:
+        # Fallback if no color provided
+        context['sidebar_color'] = random.choice(SIDEBAR_COLORS)
+
+    # Calculate dynamic image styles based on image_size percentage
+    # Base size: 260px (Web), 200px (PDF/Scaled)
+    scale_factor = image_size / 100.0
+    web_size = int(260 * scale_factor)
+    pdf_size = int(200 * scale_factor)
+    
+    context['profile_img_size_web'] = web_size
+    context['profile_img_size_pdf'] = pdf_size
+
+    # Convert image to base64
+    if image_path and os.path.exists(image_path):
+        if compress_images:
+            # Compress for PDF - much smaller file BUT increased size for visibility
+            context['profile_image'] = compress_image_base64(image_path, max_size=600, quality=75)
+        else:
+            # Full quality for HTML viewing, capped at 2x the displayed size (high-DPI screens)
+            context['profile_image'] = get_image_as_base64(image_path, max_size=web_size * 2)
+    elif 'profile_image' not in context:
+        context['profile_image'] = ""
+
+    return context
+
+
+def build_cv_html(data_dict: dict, image_path: str | None, compress_images: bool = False, image_size: int = 100, sidebar_color: str = None) -> str:
+    """Render the CV Jinja2 template to an HTML string (no disk I/O)."""
+    # Load template (compiled once, cached by the shared environment)
+    template = _JINJA_ENV.get_template('cv_leag76_template.html')
+    context = _build_cv_context(data_dict, image_path, compress_images=compress_images, image_size=image_size, sidebar_color=sidebar_color)
+    return template.render(**context)
+
+
+def _write_cv_html(data_dict: dict, image_path: str | None, output_path: Path, compress_images: bool, image_size: int, sidebar_color: str | None):
+    """Blocking part of render_cv_html (image encoding + template render + write)."""
+    template = _JINJA_ENV.get_template('cv_leag76_template.html')
+    context = _build_cv_context(data_dict, image_path, compress_images=compress_images, image_size=image_size, sidebar_color=sidebar_color)
+    
+    # Stream rendered chunks straight to disk instead of building the full string first
+    with open(output_path, 'w', encoding='utf-8') as f:
+        template.stream(**context).dump(f)
+
+
+def _build_pdf_html(data_dict: dict, image_path: str | None, sidebar_color: str | None) -> str:
+    """PDF-specific HTML (compressed images, no preview-only scripts)."""
+    return strip_preview_assets(build_cv_html(data_dict, image_path, compress_images=True, sidebar_color=sidebar_color))
+
+
 async def render_cv_html(data_dict: dict, image_path: str | None, filename: str, output_dir: Path = None, compress_images: bool = False, image_size: int = 100, sidebar_color: str = None) -> str:
     """
     Render CV as HTML using Jinja2 template.
     Returns path to the generated HTML file.
     
+    The CPU-bound work (PIL, Jinja2) runs in a worker thread so the event loop
+    keeps serving other tasks and status polls meanwhile.
+    
     Args:
         output_dir: Directory to save HTML file (defaults to OUTPUT_DIR)
         compress_images: If True, compress images for smaller file size (used for PDF)
@@ -83,60 +246,14 @@ async def render_cv_html(data_dict: dict, image_path: str | None, filename: str,
         output_dir = OUTPUT_DIR
         
     try:
-        # Load template
-        env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)))
-        template = env.get_template('cv_leag76_template.html')
-        
-        # Prepare context
-        context = data_dict.copy()
-        
-        # Convert image to base64
-        if image_path and os.path.exists(image_path):
-            if compress_images:
-                # Compress for PDF - much smaller file BUT increased size for visibility
-                context['profile_image'] = compress_image_base64(image_path, max_size=600, quality=75)
-            else:
-                # Full quality for HTML viewing
-                with open(image_path, 'rb') as img:
-                    img_b64 = base64.b64encode(img.read()).decode('utf-8')
-                    context['profile_image'] = f"data:image/jpeg;base64,{img_b64}"
-        elif 'profile_image' not in context:
-            context['profile_image'] = ""
-
-        # Add PDF generation flag
-        context['is_pdf_generation'] = True
-        
-        if sidebar_color:
-             context['sidebar_color'] = sidebar_color
-        else:
-            # Fallback if no color provided
-            sidebar_colors = [
-                '#E3F2FD', '#D1EAED', '#D4E6F1', '#EBF5FB', # Blues
-                '#E8F5E9', '#DCE6D9', '#EAFAF1',            # Greens
-                '#FAF2D3', '#FDEBD0', '#E6DDCF',            # Warm
-                '#F4ECF7', '#E8DAEF', '#FADBD8',            # Rose/Purple
-                '#E5E7E9', '#EAEDED', '#F2F3F4', '#D7DBDD'  # Neutrals
-            ]
-            context['sidebar_color'] = random.choice(sidebar_colors)
-
-        # Calculate dynamic image styles based on image_size percentage
-        # Base size: 260px (Web), 200px (PDF/Scaled)
-        scale_factor = image_size / 100.0
-        web_size = int(260 * scale_factor)
-        pdf_size = int(200 * scale_factor)
-        
-        context['profile_img_size_web'] = web_size
-        context['profile_img_size_pdf'] = pdf_size
-
-        # Render HTML
-        html_content = template.render(**context)
-        
         # Save HTML file to specified directory
         output_filename = filename.replace('.pdf', '.html')
         output_path = Path(output_dir) / output_filename
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, _write_cv_html, data_dict, image_path, output_path, compress_images, image_size, sidebar_color
+        )
             
         print(f"SUCCESS: CV HTML generated: {output_path.name}")
         return str(output_path)
@@ -148,6 +265,182 @@ async def render_cv_html(data_dict: dict, image_path: str | None, filename: str,
         raise e
 
 
+# =============================================================================
+# PERFORMANCE OPTIMIZATION: Persistent Playwright Browser
+# Chromium is launched once and reused; PDFs print on a bounded pool of pages.
+# The standalone generate_pdf_script.py subprocess is kept as a fallback for
+# environments where Playwright cannot run inside the server loop (e.g. Windows).
+# =============================================================================
+_PLAYWRIGHT = None
+_BROWSER = None
+_BROWSER_LOCK = asyncio.Lock()
+
+
+async def get_browser():
+    """Get or lazily launch the shared headless Chromium instance."""
+    global _PLAYWRIGHT, _BROWSER
+    async with _BROWSER_LOCK:
+        if _BROWSER is None or not _BROWSER.is_connected():
+            from playwright.async_api import async_playwright
+            if _PLAYWRIGHT is None:
+                _PLAYWRIGHT = await async_playwright().start()
+            _BROWSER = await _PLAYWRIGHT.chromium.launch(
+                headless=True,
+                args=["--no-sandbox", "--disable-gpu", "--font-render-hinting=none"]
+            )
+            print("DEBUG PDF: Launched persistent Chromium browser")
+    return _BROWSER
+
+
+class PagePool:
+    """
+    Bounded pool of reusable Chromium pages on the persistent browser.
+    Lets several CVs print concurrently while capping browser memory.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(size)
+    
+    async def acquire(self):
+        """Get an idle page (or open a new one) once a pool slot is free."""
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                page = self._idle.get_nowait()
+                if not page.is_closed():
+                    return page
+            browser = await get_browser()
+            context = await browser.new_context()
+            return await context.new_page()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    async def release(self, page, reusable: bool = True):
+        """Return a page to the pool, resetting its state; broken pages are discarded."""
+        try:
+            if reusable and not page.is_closed():
+                await page.goto("about:blank")
+                self._idle.put_nowait(page)
+            else:
+                await page.context.close()
+        except Exception as e:
+            print(f"WARNING: Discarding PDF page: {e}")
+        finally:
+            self._slots.release()
+    
+    async def close(self):
+        """Close all idle pages."""
+        while not self._idle.empty():
+            page = self._idle.get_nowait()
+            try:
+                await page.context.close()
+            except Exception:
+                pass
+
+
+PDF_PAGE_POOL_SIZE = int(os.getenv("PDF_PAGE_POOL_SIZE", os.cpu_count() or 4))
+_PAGE_POOL = PagePool(PDF_PAGE_POOL_SIZE)
+
+
+async def close_browser():
+    """Close the shared browser and stop Playwright (called on app shutdown)."""
+    global _PLAYWRIGHT, _BROWSER
+    await _PAGE_POOL.close()
+    async with _BROWSER_LOCK:
+        if _BROWSER is not None:
+            try:
+                await _BROWSER.close()
+            except Exception as e:
+                print(f"WARNING: Failed to close browser: {e}")
+            _BROWSER = None
+        if _PLAYWRIGHT is not None:
+            try:
+                await _PLAYWRIGHT.stop()
+            except Exception as e:
+                print(f"WARNING: Failed to stop Playwright: {e}")
+            _PLAYWRIGHT = None
+
+
+async def _run_pdf_subprocess(html_path, pdf_path) -> None:
+    """Generate a PDF via the standalone script (fresh browser per call)."""
+    script_path = BACKEND_DIR / "generate_pdf_script.py"
+    
+    def run_pdf_subprocess():
+        return subprocess.run(
+            [sys.executable, str(script_path), "--html", str(html_path), "--out", str(pdf_path)],
+            capture_output=True,
+            text=True,
+            timeout=120  # 2 minute timeout
+        )
+    
+    # Run blocking subprocess in thread pool to avoid blocking event loop
+    loop = asyncio.get_event_loop()
+    process = await loop.run_in_executor(None, run_pdf_subprocess)
+    
+    if process.returncode != 0 or "PDF Generation Complete" not in process.stdout:
+        raise RuntimeError(f"Subprocess failed. Return code: {process.returncode}. Stderr: {process.stderr}\nStdout: {process.stdout}")
+
+
+async def _print_pdf(page, pdf_path) -> None:
+    """Wait for fonts and print the loaded page to an A4 PDF."""
+    # HTML is self-contained (base64 images); "load" covers the external stylesheets
+    # and document.fonts.ready replaces the old fixed 1s settle delay
+    await page.evaluate("document.fonts.ready")
+    await page.pdf(path=str(pdf_path), **PDF_PRINT_OPTIONS)
+
+
+async def html_to_pdf(html_path, pdf_path) -> None:
+    """Print an HTML file on disk to PDF using a page from the shared pool."""
+    try:
+        page = await _PAGE_POOL.acquire()
+    except Exception as e:
+        print(f"WARNING: Persistent browser unavailable ({e}), falling back to subprocess")
+        await _run_pdf_subprocess(html_path, pdf_path)
+        return
+    
+    reusable = False
+    try:
+        file_uri = Path(html_path).absolute().as_uri()
+        await page.goto(file_uri, wait_until="load", timeout=60000)
+        await _print_pdf(page, pdf_path)
+        reusable = True
+    finally:
+        await _PAGE_POOL.release(page, reusable=reusable)
+
+
+async def html_string_to_pdf(html_content: str, pdf_path) -> None:
+    """
+    Print in-memory HTML to PDF without writing it to disk first.
+    Only the subprocess fallback needs a temporary HTML file.
+    """
+    try:
+        page = await _PAGE_POOL.acquire()
+    except Exception as e:
+        print(f"WARNING: Persistent browser unavailable ({e}), falling back to subprocess")
+        temp_html_dir = OUTPUT_DIR / "temp"
+        temp_html_dir.mkdir(exist_ok=True)
+        # Unique temp file per render; we remove exactly this file, no directory scans
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.html', prefix='temp_', dir=temp_html_dir, delete=False) as tf:
+            tf.write(html_content)
+        temp_html_path = Path(tf.name)
+        try:
+            await _run_pdf_subprocess(temp_html_path, pdf_path)
+        finally:
+            temp_html_path.unlink(missing_ok=True)
+        return
+    
+    reusable = False
+    try:
+        await page.set_content(html_content, wait_until="load", timeout=60000)
+        await _print_pdf(page, pdf_path)
+        reusable = True
+    finally:
+        await _PAGE_POOL.release(page, reusable=reusable)
+
+
 async def render_cv_pdf(data_dict: dict, image_path: str | None, filename: str, smart_category: bool = False, role: str = None, image_size: int = 100, sidebar_color: str = None) -> tuple[str, str]:
     """
     Phase 4+5: Generate HTML and PDF from CV data.
@@ -204,51 +497,13 @@ async def render_cv_pdf(data_dict: dict, image_path: str | None, filename: str,
     
     print(f"DEBUG: Phase 5 - Generating PDF with Playwright at {pdf_path}")
     
-    # Create a temporary HTML with compressed images for PDF generation
-    temp_html_dir = OUTPUT_DIR / "temp"
-    temp_html_dir.mkdir(exist_ok=True)
-    temp_html_path = await render_cv_html(data_dict, image_path, f"temp_{filename}", temp_html_dir, compress_images=True, sidebar_color=sidebar_color)
-    
+    # Render a PDF-specific HTML (compressed images) in memory - no temp file round-trip
     try:
-        # Use run_in_executor with blocking subprocess - more reliable on Windows
-        import asyncio
-        import subprocess
-        
-        script_path = BACKEND_DIR / "generate_pdf_script.py"
-        
-        print(f"DEBUG PDF: Calling script {script_path}")
-        print(f"DEBUG PDF: Input HTML: {temp_html_path}")
-        print(f"DEBUG PDF: Output PDF: {pdf_path}")
-        
-        # Run blocking subprocess in thread pool to avoid blocking event loop
-        loop = asyncio.get_event_loop()
-        
-        def run_pdf_subprocess():
-            return subprocess.run(
-                [sys.executable, str(script_path), "--html", str(temp_html_path), "--out", str(pdf_path)],
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minute timeout
-            )
-        
-        process = await loop.run_in_executor(None, run_pdf_subprocess)
-        
-        print(f"DEBUG PDF: Return code: {process.returncode}")
-        print(f"DEBUG PDF: Stdout: {process.stdout[:500] if process.stdout else 'EMPTY'}")
-        print(f"DEBUG PDF: Stderr: {process.stderr[:500] if process.stderr else 'EMPTY'}")
-        
-        if process.returncode == 0 and "PDF Generation Complete" in process.stdout:
-            print(f"SUCCESS: Phase 5 - PDF generated: {pdf_path.name}")
-            
-            # Clean up temp file
-            try:
-                os.remove(temp_html_path)
-            except:
-                pass
-                
-            return str(html_path), str(pdf_path)
-        else:
-            raise RuntimeError(f"Subprocess failed. Return code: {process.returncode}. Stderr: {process.stderr}\nStdout: {process.stdout}")
+        loop = asyncio.get_running_loop()
+        pdf_html = await loop.run_in_executor(None, _build_pdf_html, data_dict, image_path, sidebar_color)
+        await html_string_to_pdf(pdf_html, pdf_path)
+        print(f"SUCCESS: Phase 5 - PDF generated: {pdf_path.name}")
+        return str(html_path), str(pdf_path)
         
     except Exception as e:
         error_msg = f"ERROR: Phase 5 PDF generation failed: {e}"
@@ -262,12 +517,6 @@ async def render_cv_pdf(data_dict: dict, image_path: str | None, filename: str,
         except:
             pass
             
-        # Clean up temp file
-        try:
-            os.remove(temp_html_path)
-        except:
-            pass
-            
         # Return None for PDF path so caller knows it failed
         return str(html_path), None
 
@@ -279,8 +528,6 @@ async def generate_pdf_from_existing_html(html_filename: str) -> str:
     
     Note: This won't have image compression since we're using existing HTML.
     """
-    from playwright.async_api import async_playwright
-    
     html_path = OUTPUT_DIR / "html" / html_filename
     if not html_path.exists():
         raise FileNotFoundError(f"HTML file not found: {html_path}")
@@ -294,29 +541,9 @@ async def generate_pdf_from_existing_html(html_filename: str) -> str:
     print(f"DEBUG: Regenerating PDF for {html_filename}")
     
     try:
-        # Use run_in_executor with blocking subprocess - more reliable on Windows
-        import asyncio
-        import subprocess
-        
-        script_path = BACKEND_DIR / "generate_pdf_script.py"
-        
-        loop = asyncio.get_event_loop()
-        
-        def run_pdf_subprocess():
-            return subprocess.run(
-                [sys.executable, str(script_path), "--html", str(html_path), "--out", str(pdf_path)],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-        
-        process = await loop.run_in_executor(None, run_pdf_subprocess)
-        
-        if process.returncode == 0 and "PDF Generation Complete" in process.stdout:
-            print(f"SUCCESS: PDF regenerated: {pdf_path.name}")
-            return str(pdf_path)
-        else:
-            raise RuntimeError(f"Subprocess failed. Stderr: {process.stderr}\nStdout: {process.stdout}")
+        await html_to_pdf(html_path, pdf_path)
+        print(f"SUCCESS: PDF regenerated: {pdf_path.name}")
+        return str(pdf_path)
         
     except Exception as e:
         print(f"ERROR: PDF regeneration failed: {e}")
@@ -8,22 +8,31 @@ import uuid
 import random
 from dataclasses import dataclass, field
 from datetime import datetime
-from enum import Enum
+from enum import IntEnum
 from typing import Optional
 from pathlib import Path
 
 # Import roles from the database service
 from ..services.roles_service import get_all_roles, get_random_role, get_roles_by_expertise
 
-class TaskStatus(str, Enum):
-    PENDING = "pending"
-    RUNNING = "running"
-    GENERATING_CONTENT = "generating_content"
-    GENERATING_IMAGE = "generating_image" 
-    COMPLETE = "complete"
-    ERROR = "error"
+def new_id() -> str:
+    """Short 8-char id used for batches and tasks."""
+    return uuid.uuid4().hex[:8]
 
-@dataclass
+
+class TaskStatus(IntEnum):
+    """Int-valued so status checks are int compares; serialized by lowercase name."""
+    PENDING = 0
+    RUNNING = 1
+    GENERATING_CONTENT = 2
+    GENERATING_IMAGE = 3
+    COMPLETE = 4
+    ERROR = 5
+
+# JSON labels the frontend expects ("pending", "complete", ...)
+_STATUS_LABELS = {s: s.name.lower() for s in TaskStatus}
+
+@dataclass(slots=True)
 class Subtask:
     id: str
     name: str  # generate_text, generate_image, assemble_html, create_pdf
@@ -31,11 +40,10 @@ class Subtask:
     progress: int = 0
     message: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: str
     status: TaskStatus
-    created_at: str
     role: str
     origin: str
     gender: str = "any"
@@ -44,6 +52,7 @@ class Task:
     age_range: str = "25-35"
     expertise: str = "mid"
     remote: bool = False
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
     # Results
     profile_data: Optional[dict] = None # Phase 1 Result
@@ -64,11 +73,13 @@ class Task:
         Subtask(id="5", name="Phase 5: PDF Generation")
     ])
     current_subtask_index: int = 0
+    # Set when the task is removed from its batch; a worker may still be running it
+    deleted: bool = field(default=False, repr=False, compare=False)
 
     def to_dict(self):
         return {
             "id": self.id,
-            "status": self.status.value,
+            "status": _STATUS_LABELS[self.status],
             "created_at": self.created_at,
             "role": self.role,
             "origin": self.origin,
@@ -89,7 +100,7 @@ class Task:
                 {
                     "id": s.id,
                     "name": s.name,
-                    "status": s.status.value,
+                    "status": _STATUS_LABELS[s.status],
                     "progress": s.progress,
                     "message": s.message
                 } for s in self.subtasks
@@ -97,12 +108,38 @@ class Task:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Batch:
     """Represents a batch of CV generation tasks."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=new_id)
     tasks: list[Task] = field(default_factory=list)
-    created_at: datetime = field(default_factory=datetime.now)
+    # Stored pre-formatted: it is only ever serialized, never used for arithmetic
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # Selected models (profile_model, cv_model, image_model), shown in the status
+    models: Optional[dict] = None
+    
+    # Aggregate counters, kept in sync by TaskManager.set_task_status so status
+    # polls don't rescan every task
+    _completed: int = field(default=0, init=False, repr=False)
+    _failed: int = field(default=0, init=False, repr=False)
+    _in_progress: int = field(default=0, init=False, repr=False)
+    
+    def __post_init__(self):
+        self.recount()
+    
+    def recount(self):
+        """Recompute the aggregate counters from scratch (after tasks are added/removed)."""
+        self._completed = self._failed = self._in_progress = 0
+        for t in self.tasks:
+            self._count(t.status, 1)
+    
+    def _count(self, status: TaskStatus, delta: int):
+        if status == TaskStatus.COMPLETE:
+            self._completed += delta
+        elif status == TaskStatus.ERROR:
+            self._failed += delta
+        elif status != TaskStatus.PENDING:
+            self._in_progress += delta
     
     @property
     def total(self) -> int:
@@ -110,32 +147,35 @@ class Batch:
     
     @property
     def completed(self) -> int:
-        return sum(1 for t in self.tasks if t.status == TaskStatus.COMPLETE)
+        return self._completed
     
     @property
     def failed(self) -> int:
-        return sum(1 for t in self.tasks if t.status == TaskStatus.ERROR)
+        return self._failed
     
     @property
     def in_progress(self) -> int:
-        return sum(1 for t in self.tasks if t.status not in [TaskStatus.PENDING, TaskStatus.COMPLETE, TaskStatus.ERROR])
+        return self._in_progress
     
     @property
     def is_complete(self) -> bool:
-        return all(t.status in [TaskStatus.COMPLETE, TaskStatus.ERROR] for t in self.tasks)
+        return self._completed + self._failed == len(self.tasks)
     
     def to_dict(self) -> dict:
         """Convert batch to dictionary for API response."""
-        return {
+        result = {
             "id": self.id,
             "total": self.total,
             "completed": self.completed,
             "failed": self.failed,
             "in_progress": self.in_progress,
             "is_complete": self.is_complete,
-            "created_at": self.created_at.isoformat(),
+            "created_at": self.created_at,
             "tasks": [t.to_dict() for t in self.tasks]
         }
+        if self.models:
+            result["models"] = self.models
+        return result
 
 
 # Pools for randomization when "any" is selected - loaded from database
@@ -209,53 +249,64 @@ class TaskManager:
     ) -> Batch:
         """Create a new batch of CV generation tasks."""
         
-        batch_id = str(uuid.uuid4())[:8]
+        batch_id = new_id()
         tasks = []
         
-        for i in range(qty):
-            task_id = str(uuid.uuid4())[:8]
-            
-            # --- CRITICAL: RESOLVE "ANY" TO CONCRETE VALUES HERE ---
-            # This ensures that we pass a SPECIFIC profile to the LLM, 
-            # preventing it from defaulting to "Rafael Mendoza" every time.
-            
-            # 1. Resolve Gender (from database)
-            if not genders or "any" in [g.lower() for g in genders]:
-                selected_gender = random.choice(_get_genders_pool())
-            else:
-                selected_gender = random.choice(genders)
-                
-            # 2. Resolve Ethnicity (from database)
-            if not ethnicities or "any" in [e.lower() for e in ethnicities]:
-                selected_ethnicity = random.choice(_get_ethnicities_pool())
-            else:
-                selected_ethnicity = random.choice(ethnicities)
-                
-            # 3. Resolve Origin (from database)
-            if not origins or "any" in [o.lower() for o in origins]:
-                selected_origin = random.choice(_get_origins_pool())
-            else:
-                selected_origin = random.choice(origins)
-            
-            # 4. Resolve Expertise FIRST (needed for coherent role selection)
-            selected_expertise = random.choice(expertise_levels) if expertise_levels else "mid"
+        # --- CRITICAL: RESOLVE "ANY" TO CONCRETE VALUES HERE ---
+        # This ensures that we pass a SPECIFIC profile to the LLM, 
+        # preventing it from defaulting to "Rafael Mendoza" every time.
+        # All per-task picks are drawn up front with random.choices(k=qty).
+        
+        # 1. Resolve Gender (from database)
+        if not genders or "any" in [g.lower() for g in genders]:
+            gender_picks = random.choices(_get_genders_pool(), k=qty)
+        else:
+            gender_picks = random.choices(genders, k=qty)
             
-            # 5. Resolve Role - MUST match expertise level for coherence
-            if not roles or "any" in [r.lower() for r in roles]:
-                # Get roles appropriate for this expertise level
-                expertise_roles = get_roles_by_expertise(selected_expertise)
-                print(f"DEBUG BATCH: Expertise '{selected_expertise}' -> {len(expertise_roles)} roles available")
-                if expertise_roles:
-                    selected_role = random.choice(expertise_roles)
-                else:
-                    print(f"WARNING BATCH: No roles for expertise '{selected_expertise}', using fallback pool")
-                    selected_role = random.choice(_get_roles_pool())
-            else:
-                selected_role = random.choice(roles)
+        # 2. Resolve Ethnicity (from database)
+        if not ethnicities or "any" in [e.lower() for e in ethnicities]:
+            ethnicity_picks = random.choices(_get_ethnicities_pool(), k=qty)
+        else:
+            ethnicity_picks = random.choices(ethnicities, k=qty)
             
-            # Generate random age within the specified range
-            selected_age = random.randint(age_min, age_max)
-            age_range = f"{selected_age}"
+        # 3. Resolve Origin (from database)
+        if not origins or "any" in [o.lower() for o in origins]:
+            origin_picks = random.choices(_get_origins_pool(), k=qty)
+        else:
+            origin_picks = random.choices(origins, k=qty)
+        
+        # 4. Resolve Expertise FIRST (needed for coherent role selection)
+        expertise_picks = random.choices(expertise_levels, k=qty) if expertise_levels else ["mid"] * qty
+        
+        # 5. Resolve Role - MUST match expertise level for coherence
+        if not roles or "any" in [r.lower() for r in roles]:
+            # Draw roles per expertise level, loading each level's pool only once
+            role_picks = [None] * qty
+            for level in set(expertise_picks):
+                indices = [i for i, e in enumerate(expertise_picks) if e == level]
+                expertise_roles = get_roles_by_expertise(level)
+                print(f"DEBUG BATCH: Expertise '{level}' -> {len(expertise_roles)} roles available")
+                if not expertise_roles:
+                    print(f"WARNING BATCH: No roles for expertise '{level}', using fallback pool")
+                    expertise_roles = _get_roles_pool()
+                for i, role in zip(indices, random.choices(expertise_roles, k=len(indices))):
+                    role_picks[i] = role
+        else:
+            role_picks = random.choices(roles, k=qty)
+        
+        # Generate random age within the specified range
+        age_picks = random.choices(range(age_min, age_max + 1), k=qty)
+        task_ids = [new_id() for _ in range(qty)]
+        created_at = datetime.now().isoformat()
+        
+        for i in range(qty):
+            task_id = task_ids[i]
+            selected_gender = gender_picks[i]
+            selected_ethnicity = ethnicity_picks[i]
+            selected_origin = origin_picks[i]
+            selected_expertise = expertise_picks[i]
+            selected_role = role_picks[i]
+            age_range = f"{age_picks[i]}"
             
             print(f"DEBUG BATCH: Task {task_id} -> Role: {selected_role}, Expertise: {selected_expertise}, "
                   f"Gender: {selected_gender}, Ethnicity: {selected_ethnicity}, Origin: {selected_origin}")
@@ -264,7 +315,7 @@ class TaskManager:
                 id=task_id,
                 batch_id=batch_id,
                 status=TaskStatus.PENDING,
-                created_at=datetime.now().isoformat(),
+                created_at=created_at,
                 role=selected_role,
                 origin=selected_origin,
                 gender=selected_gender,
@@ -277,12 +328,23 @@ class TaskManager:
             )
             tasks.append(task)
         
-        batch = Batch(id=batch_id, tasks=tasks)
+        batch = Batch(id=batch_id, tasks=tasks, created_at=created_at)
         self.batches[batch_id] = batch
         self.current_batch_id = batch_id
         
         return batch
     
+    def set_task_status(self, task: Task, status: TaskStatus):
+        """Change a task's status and update its batch's aggregate counters."""
+        old_status = task.status
+        if old_status == status:
+            return
+        task.status = status
+        batch = self.batches.get(task.batch_id)
+        if batch is not None and not task.deleted:
+            batch._count(old_status, -1)
+            batch._count(status, 1)
+    
     def get_batch(self, batch_id: str) -> Optional[Batch]:
         """Get a batch by ID."""
         return self.batches.get(batch_id)
@@ -294,9 +356,24 @@ class TaskManager:
         return None
     
     async def _save_batches(self):
-        """Dummy persistent save - could implement JSON DB here."""
+        """Dummy persistent save - could implement JSON DB here.
+        
+        A real store should write a temp file and os.replace() it (atomic), off
+        the event loop, and be called from mark_dirty.
+        """
         pass
     
+    def mark_dirty(self, batch_id: Optional[str] = None):
+        """Persistence hook, called whenever a batch's state changes.
+        
+        Every state change (including delete_task) comes through here. It is a
+        no-op while _save_batches is a placeholder; a real store should save
+        (and debounce) from here instead of on every transition.
+        
+        Args:
+            batch_id: Batch that changed
+        """
+    
     def get_all_batches(self) -> list[Batch]:
         """Get all batches."""
         return list(self.batches.values())
@@ -305,20 +382,24 @@ class TaskManager:
     def delete_task(self, task_id: str) -> bool:
         """Delete a task by ID from any batch."""
         for batch in self.batches.values():
-            initial_len = len(batch.tasks)
-            batch.tasks = [t for t in batch.tasks if t.id != task_id]
-            if len(batch.tasks) < initial_len:
-                # If we had persistence, we would save here
-                self._save_batches() 
+            for i, t in enumerate(batch.tasks):
+                if t.id != task_id:
+                    continue
+                # Flag it so later status changes from a still-running worker
+                # don't touch this batch's counters
+                t.deleted = True
+                # Rebind rather than mutate: a running pipeline may hold the old list
+                batch.tasks = batch.tasks[:i] + batch.tasks[i + 1:]
+                batch.recount()
+                self.mark_dirty(batch.id)
                 return True
         return False
 
     def clear_batches(self):
         """Clear all completed batches."""
-        self.batches = {
-            k: v for k, v in self.batches.items()
-            if not v.is_complete
-        }
+        # Delete in place (is_complete is O(1) thanks to the cached counters)
+        for batch_id in [k for k, v in self.batches.items() if v.is_complete]:
+            del self.batches[batch_id]
 
 
 # Global task manager instance
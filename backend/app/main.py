@@ -4,50 +4,67 @@ Main entry point with CORS, static files, and router registration
 """
 
 import os
+import re
+import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
-from dotenv import load_dotenv
 
 # Load environment variables from correct path
 BACKEND_DIR_INIT = Path(__file__).parent.parent
 ENV_PATH = BACKEND_DIR_INIT / ".env"
 
+# Logging - child of the "app" logger from logging_config, so records reach
+# logs/app.log. Messages use lazy %-formatting so disabled DEBUG lines cost
+# nothing to build.
+from .core.logging_config import set_log_level
+logger = logging.getLogger("app.main")
+
+_ENV_RE = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)\s*$')
+
 # Manual .env reader (bypasses broken load_dotenv)
 def load_env_manually(env_path: Path):
-    """Manually read .env file and set environment variables."""
+    """Manually read .env file and set environment variables.
+    
+    Set SKIP_DOTENV=1 in production to rely on OS-provided variables only.
+    """
+    if os.getenv("SKIP_DOTENV"):
+        logger.debug("SKIP_DOTENV set - not reading %s", env_path)
+        return
     if not env_path.exists():
-        print(f"WARNING: .env file not found at {env_path}")
+        logger.warning(".env file not found at %s", env_path)
         return
     
     try:
-        with open(env_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, _, value = line.partition('=')
-                    key = key.strip()
-                    value = value.strip()
-                    # Remove quotes if present
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    if value.startswith("'") and value.endswith("'"):
-                        value = value[1:-1]
-                    os.environ[key] = value
-                    print(f"DEBUG: Set {key}={value[:15]}..." if len(value) > 15 else f"DEBUG: Set {key}={value}")
+        text = env_path.read_text(encoding='utf-8')
     except Exception as e:
-        print(f"ERROR reading .env: {e}")
+        logger.error("Error reading .env: %s", e)
+        return
+    
+    loaded = 0
+    for line in text.splitlines():
+        match = _ENV_RE.match(line)
+        if not match:
+            continue  # Blank lines, comments and malformed entries
+        key, value = match.groups()
+        # Remove quotes if present
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+            value = value[1:-1]
+        os.environ[key] = value
+        loaded += 1
+    logger.debug("Loaded %d variables from .env", loaded)
 
 # Load using manual reader
 load_env_manually(ENV_PATH)
+set_log_level(os.getenv("LOG_LEVEL", "INFO"))  # .env may set LOG_LEVEL
 
 # Debug: Confirm API key loaded at startup
 _api_key = os.getenv("OPENROUTER_API_KEY", "")
-print(f"DEBUG MAIN: .env path: {ENV_PATH} (exists: {ENV_PATH.exists()})")
-print(f"DEBUG MAIN: OPENROUTER_API_KEY loaded: {'YES (' + _api_key[:8] + '...)' if _api_key and len(_api_key) > 8 else 'NO/EMPTY'}")
+logger.debug(".env path: %s (exists: %s)", ENV_PATH, ENV_PATH.exists())
+logger.debug("OPENROUTER_API_KEY loaded: %s", "YES" if _api_key and len(_api_key) > 8 else "NO/EMPTY")
 
 from .routers import generation, webhooks, public_api
 
@@ -71,19 +88,28 @@ if not IS_VERCEL:
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
-    print(">> AI CV Suite Backend Starting...")
-    print(f">> Output Directory: {OUTPUT_DIR}")
-    print(f">> Assets Directory: {ASSETS_DIR}")
-    print(f">> Templates Directory: {TEMPLATES_DIR}")
+    logger.info(">> AI CV Suite Backend Starting...")
+    logger.info(">> Output Directory: %s", OUTPUT_DIR)
+    logger.info(">> Assets Directory: %s", ASSETS_DIR)
+    logger.info(">> Templates Directory: %s", TEMPLATES_DIR)
     
     # Check LLM provider
     llm_provider = "openrouter" if os.getenv("OPENROUTER_API_KEY") else "mock"
-    print(f">> LLM Provider: {llm_provider}")
+    logger.info(">> LLM Provider: %s", llm_provider)
+    
+    # Create the pooled HTTP clients up front so the first batch doesn't pay for them
+    from .services import llm_service, krea_service
+    await llm_service.get_http_client()
+    await krea_service.get_http_client()
     
     yield
     
     # Shutdown
-    print(">> AI CV Suite Backend Shutting Down...")
+    logger.info(">> AI CV Suite Backend Shutting Down...")
+    await llm_service.close_http_client()
+    await krea_service.close_http_client()
+    from .core.pdf_engine import close_browser
+    await close_browser()
 
 
 # Create FastAPI app
@@ -95,7 +121,19 @@ app = FastAPI(
 )
 
 # Configure CORS
-origins = ["*"]  # Allow all origins for development to avoid CORS issues
+# Explicit origins: "*" is not valid together with allow_credentials, and a set
+# gives Starlette an O(1) exact-match lookup. The Vite dev server proxies /api,
+# so production (frontend served by this app) is same-origin and needs no entry.
+# Extra origins can be added with ALLOWED_ORIGINS (comma-separated).
+DEFAULT_ORIGINS = (
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+)
+origins = frozenset(DEFAULT_ORIGINS) | frozenset(
+    o.strip().rstrip("/") for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -105,6 +143,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (CV HTML files, status payloads with many tasks).
+# Level 6 keeps most of the size win at a fraction of level 9's CPU cost.
+# PDF and ZIP downloads are already deflated, so they are sent untouched.
+from .middleware.gzip import SelectiveGZipMiddleware
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    exclude_prefixes=("/api/files/pdf/", "/api/download-zip"),
+    minimum_size=1024,
+    compresslevel=6,
+)
+
 # Add rate limiting middleware
 from .middleware.rate_limit import rate_limit_middleware
 app.middleware("http")(rate_limit_middleware)
@@ -124,10 +173,8 @@ async def get_config():
     Returns roles, genders, ethnicities, origins, expertise_levels.
     Frontend should fetch this on mount to populate dropdowns.
     """
-    print("DEBUG API: /api/config endpoint called")
     config = get_all_config()
-    print(f"DEBUG API: Serving config with {len(config.get('roles', []))} roles")
-    print(f"DEBUG API: Serving config with {len(config.get('roles', []))} roles")
+    logger.debug("Serving config with %d roles", len(config.get('roles', [])))
     return JSONResponse(content=config)
 
 @app.get("/api/health")
@@ -140,7 +187,7 @@ async def ping():
     return {"message": "pong"}
 
 # Include routers - Load generation router AFTER config just in case
-print("DEBUG MAIN: Loading generation router...")
+logger.debug("Loading generation router...")
 app.include_router(generation.router)
 app.include_router(webhooks.router)
 app.include_router(public_api.router)
@@ -155,21 +202,20 @@ POSSIBLE_FRONTEND_PATHS = [
 
 FRONTEND_DIR = None
 for path in POSSIBLE_FRONTEND_PATHS:
-    resolved = path.resolve() if path.exists() else path
-    print(f"DEBUG MAIN: Checking frontend path: {resolved} (exists: {path.exists()})")
+    logger.debug("Checking frontend path: %s (exists: %s)", path, path.exists())
     if path.exists():
         FRONTEND_DIR = path
         break
 
 if FRONTEND_DIR:
-    print(f"DEBUG MAIN: Using frontend dir: {FRONTEND_DIR}")
+    logger.debug("Using frontend dir: %s", FRONTEND_DIR)
     # Serve assets subdirectory
     assets_dir = FRONTEND_DIR / "assets"
     if assets_dir.exists():
-        print(f"DEBUG MAIN: Mounting /assets from {assets_dir}")
+        logger.debug("Mounting /assets from %s", assets_dir)
         app.mount("/assets", StaticFiles(directory=str(assets_dir)), name="frontend_assets")
 else:
-    print("DEBUG MAIN: No frontend directory found - API only mode")
+    logger.info("No frontend directory found - API only mode")
 
 @app.get("/")
 async def root():
@@ -179,8 +225,6 @@ async def root():
     # Check if frontend build exists (production deployment)
     if FRONTEND_DIR:
         index_file = FRONTEND_DIR / "index.html"
-        print(f"DEBUG MAIN: Checking for index.html at {index_file} (exists: {index_file.exists()})")
-        
         if index_file.exists():
             return FileResponse(index_file, media_type="text/html")
     
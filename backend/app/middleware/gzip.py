@@ -0,0 +1,28 @@
+"""
+Selective GZip Middleware
+"""
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """GZip responses except on routes that serve already-compressed files.
+
+    PDFs and ZIPs gain nothing from a second deflate pass, and compressing them
+    drops Content-Length (no download progress) while burning event-loop CPU.
+
+    Args:
+        exclude_prefixes: Path prefixes whose responses are sent as-is
+        **gzip_options: Passed through to GZipMiddleware (minimum_size, compresslevel)
+    """
+
+    def __init__(self, app: ASGIApp, exclude_prefixes: tuple[str, ...] = (), **gzip_options):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, **gzip_options)
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip_app(scope, receive, send)
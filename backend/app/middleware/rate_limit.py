@@ -6,10 +6,13 @@ from fastapi.responses import JSONResponse
 from ..core.rate_limiter import rate_limiter
 import time
 
+# Paths exempt from rate limiting (frozenset: O(1) lookup, no per-request list)
+_EXEMPT_PATHS = frozenset({"/api/health", "/docs", "/openapi.json", "/redoc"})
+
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware."""
     # Skip rate limiting for health checks and docs
-    if request.url.path in ["/api/health", "/docs", "/openapi.json", "/redoc"]:
+    if request.url.path in _EXEMPT_PATHS:
         return await call_next(request)
     
     # Get client identifier (IP address)
@@ -5,23 +5,23 @@ Handles batch generation, status tracking, model selection, and file management
 
 import os
 import asyncio
-import subprocess
 import sys
 import zipfile
 import tempfile
 from pathlib import Path
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Request
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
 from ..core.task_manager import task_manager, Task, TaskStatus
 from ..core.pdf_engine import render_cv_pdf, generate_pdf_from_existing_html
 from ..core.cache import cache
+from ..core.file_registry import file_registry
 from ..core.logging_config import log_info, log_error, log_request
-from ..services.llm_service import generate_cv_content_v2, generate_profile_data, get_available_models as get_llm_models, create_user_prompt, FALLBACK_LLM_MODELS
-from ..services.krea_service import generate_avatar, get_available_models as get_image_models, get_avatar_prompt
+from ..services.llm_service import generate_cv_content_v2, generate_profile_data, get_available_models as get_llm_models, create_user_prompt, FALLBACK_LLM_MODELS, OPENROUTER_API_KEY
+from ..services.krea_service import generate_avatar, get_available_models as get_image_models, get_avatar_prompt, KREA_API_KEY
 import random
 
 # Try to import webhook trigger (may not exist yet)
@@ -44,6 +44,10 @@ AVATARS_DIR = OUTPUT_DIR / "avatars"
 # Detect Vercel environment
 IS_VERCEL = os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV') is not None
 
+# Server-side key availability for /health (environment is read once at import)
+HAS_OPENROUTER = bool(OPENROUTER_API_KEY)
+HAS_KREA = bool(KREA_API_KEY)
+
 # Ensure all directories exist (skip on Vercel - read-only filesystem)
 if not IS_VERCEL:
     OUTPUT_DIR.mkdir(exist_ok=True)
@@ -167,7 +171,17 @@ async def start_generation(
     x_krea_key: Optional[str] = Header(None, alias="X-Krea-Key")
 ):
     """Start a batch CV generation."""
-    from ..services.batch_service import process_batch, batch_models
+    from ..services.batch_service import process_batch, try_reserve_batch_slot, release_batch_slot
+    
+    # Backpressure: refuse new batches while every batch slot is busy. The slot
+    # is claimed here (not when the background task starts) so the cap holds
+    # for concurrent requests; process_batch releases it.
+    if not try_reserve_batch_slot():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many batches in progress. Please wait for one to finish.",
+            headers={"Retry-After": "30"}
+        )
     
     # Collect API Keys
     api_keys = {
@@ -175,20 +189,24 @@ async def start_generation(
         "krea": x_krea_key
     }
     # Create batch
-    batch = await task_manager.create_batch(
-        qty=request.qty,
-        genders=request.genders,
-        ethnicities=request.ethnicities,
-        origins=request.origins,
-        roles=request.roles,
-        age_min=request.age_min,
-        age_max=request.age_max,
-        expertise_levels=request.expertise_levels,
-        remote=request.remote
-    )
+    try:
+        batch = await task_manager.create_batch(
+            qty=request.qty,
+            genders=request.genders,
+            ethnicities=request.ethnicities,
+            origins=request.origins,
+            roles=request.roles,
+            age_min=request.age_min,
+            age_max=request.age_max,
+            expertise_levels=request.expertise_levels,
+            remote=request.remote
+        )
+    except Exception:
+        release_batch_slot()
+        raise
     
     # Store model selections
-    batch_models[batch.id] = {
+    batch.models = {
         "profile_model": request.profile_model or request.llm_model,
         "cv_model": request.cv_model or request.llm_model,
         "image_model": request.image_model
@@ -216,11 +234,10 @@ async def start_generation(
 @router.get("/status")
 async def get_status():
     """Get the current batch generation status."""
-    from ..services.batch_service import batch_models
     batch = task_manager.get_current_batch()
     
     if not batch:
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "batch_id": None,
             "total": 0,
             "completed": 0,
@@ -230,11 +247,8 @@ async def get_status():
             "tasks": []
         })
     
-    result = batch.to_dict()
-    if batch.id in batch_models:
-        result["models"] = batch_models[batch.id]
-    
-    return JSONResponse(content=result)
+    # Polled every 1-2s by the UI: task dicts are cached, orjson serializes them in C
+    return ORJSONResponse(content=batch.to_dict())
 
 
 @router.get("/status/{batch_id}")
@@ -243,74 +257,109 @@ async def get_batch_status(batch_id: str):
     batch = task_manager.get_batch(batch_id)
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
-    return JSONResponse(content=batch.to_dict())
+    return ORJSONResponse(content=batch.to_dict())
 
 
 @router.get("/files", response_model=FilesResponse)
-async def list_files():
-    """List generated CVs - one entry per CV (HTML files only, frontend derives PDF)."""
-    files = []
+async def list_files(limit: Optional[int] = None):
+    """List generated CVs - one entry per CV (HTML files only, frontend derives PDF).
     
+    Served from the in-memory file registry (no directory scan per request).
+    Use `limit` to only return the newest N files.
+    """
+    # Only list HTML files - each HTML represents one CV
+    # Frontend will use the filename to construct PDF URL
     try:
-        # Only list HTML files - each HTML represents one CV
-        # Frontend will use the filename to construct PDF URL
-        if HTML_DIR.exists():
-            html_files = list(HTML_DIR.glob("*.html"))
-            print(f"DEBUG /api/files: Found {len(html_files)} HTML files")
-            
-            for filepath in sorted(html_files, key=lambda x: x.stat().st_mtime, reverse=True):
-                try:
-                    stat = filepath.stat()
-                    files.append(FileInfo(
-                        filename=filepath.name,
-                        path=str(filepath),
-                        created_at=datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        size_kb=round(stat.st_size / 1024, 2)
-                    ))
-                except Exception as e:
-                    print(f"WARNING: Error reading file {filepath.name}: {e}")
-                    continue
-        else:
-            print(f"WARNING: HTML_DIR does not exist: {HTML_DIR}")
+        if file_registry.is_stale():
+            # First call (or the folder changed outside the app) scans the
+            # folder - keep that off the event loop
+            await asyncio.to_thread(file_registry.rescan)
+        files = file_registry.list()
     except Exception as e:
         print(f"ERROR /api/files: {e}")
-        import traceback
-        traceback.print_exc()
+        files = []
+    
+    total = len(files)
+    if limit is not None and limit >= 0:
+        files = files[:limit]
+    # Registry entries already have the FileInfo shape; returning a Response skips
+    # building (and re-validating) one pydantic model per file on every call.
+    # response_model stays on the route for the OpenAPI schema.
+    return ORJSONResponse(content={"files": files, "total": total})
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header lists etag (weak comparison) or is "*"."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+def _file_response(request: Request, filepath: Optional[Path], media_type: str, not_found: str) -> Response:
+    """Serve a file inline, reusing our single stat() for FileResponse's headers.
+    
+    Sends an ETag built from mtime+size and answers 304 when the client already
+    has that version. Files can be rewritten in place (regenerate-pdf), so they
+    are revalidated (no-cache) rather than marked immutable.
+    """
+    try:
+        stat = filepath.stat() if filepath is not None else None
+    except OSError:
+        stat = None
+    if stat is None:
+        raise HTTPException(status_code=404, detail=not_found)
     
-    print(f"DEBUG /api/files: Returning {len(files)} files")
-    return FilesResponse(files=files, total=len(files))
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path=str(filepath), media_type=media_type, stat_result=stat, headers=headers)  # No filename = opens inline
 
 
 @router.get("/files/html/{filename}")
-async def get_html_file(filename: str):
+async def get_html_file(filename: str, request: Request):
     """Download/view a specific HTML file."""
-    filepath = HTML_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="HTML File not found")
-    return FileResponse(path=str(filepath), media_type="text/html")  # No filename = opens inline
+    return _file_response(request, HTML_DIR / filename, "text/html", "HTML File not found")
 
 
-@router.get("/files/pdf/{filename}")
-async def get_pdf_file(filename: str):
-    """Download/view a specific PDF file."""
-    filepath = PDFS_DIR / filename
-    
+# Where smart-category PDFs were found, so repeat downloads skip the recursive
+# walk over every category subfolder. Entries are re-checked before use.
+_PDF_LOCATIONS: dict[str, Path] = {}
+
+
+def _find_pdf(filename: str) -> Optional[Path]:
+    """Locate a PDF in the root PDF dir or any category subfolder."""
     # 1. Check root PDF dir (Legacy/Normal)
+    filepath = PDFS_DIR / filename
     if filepath.exists():
-        return FileResponse(path=str(filepath), media_type="application/pdf")
-        
-    # 2. Smart Category Support: Search in subdirectories
-    # We use rglob to find the file in any category subfolder
-    found_files = list(PDFS_DIR.rglob(filename))
-    if found_files:
-        return FileResponse(path=str(found_files[0]), media_type="application/pdf")
+        return filepath
+    
+    # 2. Smart Category Support: previously resolved subfolder location
+    cached = _PDF_LOCATIONS.get(filename)
+    if cached is not None and cached.exists():
+        return cached
+    
+    # 3. Search in subdirectories (first match only - no need to walk the rest)
+    found = next(PDFS_DIR.rglob(filename), None)
+    if found is not None:
+        _PDF_LOCATIONS[filename] = found
+    else:
+        _PDF_LOCATIONS.pop(filename, None)
+    return found
 
-    raise HTTPException(status_code=404, detail="PDF File not found")
 
+@router.get("/files/pdf/{filename}")
+async def get_pdf_file(filename: str, request: Request):
+    """Download/view a specific PDF file."""
+    return _file_response(request, _find_pdf(filename), "application/pdf", "PDF File not found")
 
-@router.delete("/files/{filename}")
-async def delete_file(filename: str):
-    """Delete a file (HTML and its corresponding PDF)."""
+
+def _delete_cv_files(filename: str) -> list[str]:
+    """Blocking part of delete_file: unlink the HTML and its PDF(s)."""
     deleted = []
     
     # 1. Delete HTML
@@ -332,6 +381,16 @@ async def delete_file(filename: str):
         for p in found_pdfs:
             p.unlink()
             deleted.append(f"PDF({p.parent.name})")
+    return deleted
+
+
+@router.delete("/files/{filename}")
+async def delete_file(filename: str):
+    """Delete a file (HTML and its corresponding PDF)."""
+    # Filesystem work runs in a thread so a delete never stalls running batches
+    deleted = await asyncio.to_thread(_delete_cv_files, filename)
+    file_registry.remove(filename)
+    _PDF_LOCATIONS.pop(filename.replace('.html', '.pdf'), None)
             
     if not deleted:
          # If nothing found, still return success to keep frontend in sync
@@ -340,18 +399,30 @@ async def delete_file(filename: str):
     return {"message": f"Deleted {' + '.join(deleted)}"}
 
 
+# Fire-and-forget helpers (e.g. reaping opener processes) kept alive until done
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
 @router.post("/open-folder")
 async def open_folder():
     """Open output folder."""
     # Modified to open the HTML directory as requested
     folder_path = str(HTML_DIR.absolute())
     try:
+        # Don't block the event loop on the file manager starting up
         if sys.platform == "win32":
-            os.startfile(folder_path)
-        elif sys.platform == "darwin":
-            subprocess.run(["open", folder_path])
+            await asyncio.to_thread(os.startfile, folder_path)
         else:
-            subprocess.run(["xdg-open", folder_path])
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            proc = await asyncio.create_subprocess_exec(
+                opener, folder_path,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            # Reap it in the background; keep a reference so the task isn't GC'd
+            reaper = asyncio.create_task(proc.wait())
+            _BACKGROUND_TASKS.add(reaper)
+            reaper.add_done_callback(_BACKGROUND_TASKS.discard)
         return {"message": "Opened folder", "path": folder_path}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -365,9 +436,8 @@ async def delete_task(task_id: str):
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": f"Task {task_id} deleted"}
 
-@router.delete("/clear")
-async def clear_all():
-    """Clear all files."""
+def _clear_output_files():
+    """Blocking part of clear_all (can be thousands of unlinks)."""
     if OUTPUT_DIR.exists():
         for f in OUTPUT_DIR.glob("*.*"):
             if f.is_file(): f.unlink()
@@ -377,9 +447,16 @@ async def clear_all():
     if ASSETS_DIR.exists():
         for f in ASSETS_DIR.glob("avatar_*.jpg"):
             f.unlink()
+
+
+@router.delete("/clear")
+async def clear_all():
+    """Clear all files."""
+    await asyncio.to_thread(_clear_output_files)
+    file_registry.clear()
+    _PDF_LOCATIONS.clear()
     
     task_manager.clear_batches()
-    batch_models.clear()
     return {"message": "Cleared all generated files"}
 
 
@@ -388,8 +465,8 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "openrouter": bool(os.getenv("OPENROUTER_API_KEY")),
-        "krea": bool(os.getenv("KREA_API_KEY"))
+        "openrouter": HAS_OPENROUTER,
+        "krea": HAS_KREA
     }
 
 
@@ -434,7 +511,8 @@ async def regenerate_all_pdfs(background_tasks: BackgroundTasks):
                 failed += 1
         print(f"Batch PDF regeneration complete: {success} success, {failed} failed")
     
-    background_tasks.add_task(lambda: asyncio.run(process_all()))
+    # Run on the server loop so the shared Playwright browser can be reused
+    background_tasks.add_task(process_all)
     
     return {
         "message": f"Started regenerating PDFs for {len(html_files)} HTML files",
@@ -449,6 +527,22 @@ class DownloadZipRequest(BaseModel):
     include_avatars: bool = Field(default=False, description="Include avatar images in ZIP")
 
 
+class _TempFileResponse(FileResponse):
+    """FileResponse that deletes its file once the send ends.
+    
+    Unlike a background task, the finally also runs when the client
+    disconnects mid-download, so temporary ZIPs never pile up on disk.
+    """
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                Path(self.path).unlink(missing_ok=True)
+            except OSError as e:
+                print(f"Warning: Failed to cleanup temp ZIP: {e}")
+
+
 @router.post("/download-zip")
 async def download_zip(request: DownloadZipRequest):
     """
@@ -567,34 +661,15 @@ async def download_zip(request: DownloadZipRequest):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         zip_filename = f"CVs_Batch_{timestamp}.zip"
         
-        # Return ZIP as streaming response
-        def cleanup():
-            """Clean up temporary file after download."""
-            try:
-                if temp_zip_path.exists():
-                    temp_zip_path.unlink()
-            except Exception as e:
-                print(f"Warning: Failed to cleanup temp ZIP: {e}")
-        
-        # Read ZIP file and stream it
-        def generate():
-            try:
-                with open(temp_zip_path, 'rb') as f:
-                    while True:
-                        chunk = f.read(8192)  # 8KB chunks
-                        if not chunk:
-                            break
-                        yield chunk
-            finally:
-                cleanup()
-        
-        return StreamingResponse(
-            generate(),
+        # FileResponse streams the ZIP in 64KB async reads (instead of one
+        # threadpool hop per 8KB chunk of a sync generator) and sets
+        # Content-Length from the stat (the route is excluded from gzip), so
+        # clients get a real progress bar
+        return _TempFileResponse(
+            path=str(temp_zip_path),
             media_type="application/zip",
-            headers={
-                "Content-Disposition": f'attachment; filename="{zip_filename}"',
-                "Content-Type": "application/zip"
-            }
+            filename=zip_filename,  # Content-Disposition: attachment
+            stat_result=temp_zip_path.stat()
         )
         
     except Exception as e:
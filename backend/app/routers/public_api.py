@@ -1,7 +1,7 @@
 """
 Public API Router - Public endpoints for external integrations
 """
-from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi import APIRouter, HTTPException, Header, Depends, BackgroundTasks
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
@@ -46,7 +46,7 @@ class PublicGenerationResponse(BaseModel):
 
 
 @router.post("/generate", response_model=PublicGenerationResponse, dependencies=[Depends(verify_api_key)])
-async def public_generate(request: PublicGenerationRequest):
+async def public_generate(request: PublicGenerationRequest, background_tasks: BackgroundTasks):
     """
     Public API endpoint to generate CVs.
     Requires X-API-Key header.
@@ -68,24 +68,35 @@ async def public_generate(request: PublicGenerationRequest):
         
         # Start generation using the same logic as internal endpoint
         from ..core.task_manager import task_manager
-        from ..services.batch_service import process_batch, batch_models
-        from fastapi import BackgroundTasks
+        from ..services.batch_service import process_batch, try_reserve_batch_slot, release_batch_slot
+        
+        # Same backpressure as the internal endpoint: claim a batch slot up front
+        if not try_reserve_batch_slot():
+            raise HTTPException(
+                status_code=429,
+                detail="Too many batches in progress. Please wait for one to finish.",
+                headers={"Retry-After": "30"}
+            )
         
         # Create batch
-        batch = await task_manager.create_batch(
-            qty=request.qty,
-            genders=request.genders,
-            ethnicities=request.ethnicities,
-            origins=request.origins,
-            roles=request.roles,
-            age_min=request.age_min,
-            age_max=request.age_max,
-            expertise_levels=request.expertise_levels,
-            remote=request.remote
-        )
+        try:
+            batch = await task_manager.create_batch(
+                qty=request.qty,
+                genders=request.genders,
+                ethnicities=request.ethnicities,
+                origins=request.origins,
+                roles=request.roles,
+                age_min=request.age_min,
+                age_max=request.age_max,
+                expertise_levels=request.expertise_levels,
+                remote=request.remote
+            )
+        except Exception:
+            release_batch_slot()
+            raise
         
         # Store model selections
-        batch_models[batch.id] = {
+        batch.models = {
             "profile_model": request.profile_model,
             "cv_model": request.cv_model,
             "image_model": request.image_model
@@ -93,6 +104,17 @@ async def public_generate(request: PublicGenerationRequest):
         
         batch_id = batch.id
         
+        # Start background processing (releases the slot when done)
+        background_tasks.add_task(
+            process_batch,
+            batch_id,
+            request.profile_model,
+            request.cv_model,
+            request.image_model,
+            batch_request["smart_category"],
+            batch_request["image_size"]
+        )
+        
         response = PublicGenerationResponse(
             batch_id=batch_id,
             status="queued",
@@ -106,6 +128,8 @@ async def public_generate(request: PublicGenerationRequest):
         log_info("Public API: Generation started", {"batch_id": batch_id})
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         log_error(e, {"endpoint": "/api/public/generate"})
         raise HTTPException(status_code=500, detail=str(e))
@@ -8,7 +8,7 @@ from datetime import datetime
 import httpx
 import hashlib
 import hmac
-import json
+import orjson
 
 router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
 
@@ -109,12 +109,15 @@ async def trigger_webhook(event_type: str, payload: Dict[str, Any]):
                 "data": payload
             }
 
+            # Serializar una sola vez: se firman exactamente los bytes enviados
+            body = orjson.dumps(webhook_payload)
+
             # Añadir firma si hay secret
             headers = {"Content-Type": "application/json"}
             if webhook_data["secret"]:
                 signature = hmac.new(
                     webhook_data["secret"].encode(),
-                    json.dumps(webhook_payload).encode(),
+                    body,
                     hashlib.sha256
                 ).hexdigest()
                 headers["X-Webhook-Signature"] = f"sha256={signature}"
@@ -123,7 +126,7 @@ async def trigger_webhook(event_type: str, payload: Dict[str, Any]):
             async with httpx.AsyncClient(timeout=10.0) as client:
                 response = await client.post(
                     webhook_data["url"],
-                    json=webhook_payload,
+                    content=body,
                     headers=headers
                 )
                 response.raise_for_status()
@@ -14,12 +14,16 @@ Performance optimizations:
 
 import asyncio
 import os
+import re
 import time
 from pathlib import Path
 from typing import Optional
 
+import aiofiles
+
 from ..core.task_manager import task_manager, Task, TaskStatus
-from ..core.pdf_engine import render_cv_pdf
+from ..core.pdf_engine import render_cv_pdf, SIDEBAR_COLORS
+from ..core.file_registry import file_registry
 from ..services.llm_service import generate_cv_content_v2, generate_profile_data
 from ..services.krea_service import generate_avatar
 
@@ -28,11 +32,73 @@ BACKEND_DIR = Path(__file__).parent.parent.parent
 OUTPUT_DIR = BACKEND_DIR / "output"
 PROMPTS_DIR = OUTPUT_DIR / "prompts"
 
-# Store selected models per batch (moved from router)
-batch_models = {}
+# Max tasks of a batch in each pipeline stage (profile, content+avatar, render) at once
+BATCH_WORKERS = max(1, int(os.getenv("BATCH_WORKERS", 10)))
+
+# Max concurrent API calls, one limit per external service so a slow image job
+# never holds a slot an LLM call could use (and vice versa). Module-level so
+# overlapping batches share the limits instead of each getting their own.
+# OpenRouter supports ~50 req/min, Krea supports concurrent jobs
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 8))
+IMG_CONCURRENCY = int(os.getenv("IMG_CONCURRENCY", 4))
+llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+img_semaphore = asyncio.Semaphore(IMG_CONCURRENCY)
+
+# Max batches processed at the same time. Slots are reserved by the request
+# handler (which answers 429 when none is free) and released when process_batch
+# ends, so rapid requests can't pile up whole batches in memory.
+MAX_ACTIVE_BATCHES = max(1, int(os.getenv("MAX_ACTIVE_BATCHES", 2)))
+_reserved_batches = 0
+
+
+def try_reserve_batch_slot() -> bool:
+    """Claim a batch slot; False if all MAX_ACTIVE_BATCHES are taken.
+    
+    Plain check-and-increment with no await in between, so it is atomic on the
+    event loop. Every successful call must be paired with release_batch_slot().
+    """
+    global _reserved_batches
+    if _reserved_batches >= MAX_ACTIVE_BATCHES:
+        return False
+    _reserved_batches += 1
+    return True
+
+
+def release_batch_slot():
+    """Give back a slot claimed with try_reserve_batch_slot()."""
+    global _reserved_batches
+    _reserved_batches = max(0, _reserved_batches - 1)
+
+# Everything but word characters and '-' is dropped from filename parts.
+# \w matches Unicode letters/digits like str.isalnum(), so accented names survive.
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w-]")
+
+
+def _sanitize_filename_part(value: str) -> str:
+    """Make a profile field safe to embed in a CV filename."""
+    return _UNSAFE_FILENAME_CHARS.sub("", value.replace(" ", "_"))
+
+
+async def _save_prompt(filename: str, prompt: str):
+    """Save a prompt for debugging without blocking the event loop (best effort)."""
+    try:
+        if not PROMPTS_DIR.exists():
+            PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(PROMPTS_DIR / filename, "w", encoding="utf-8") as f:
+            await f.write(prompt)
+    except Exception:
+        pass
 
 
 async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: Optional[str], image_model: Optional[str], smart_category: bool = False, image_size: int = 100, api_keys: dict = None):
+    """Run a batch whose slot was reserved with try_reserve_batch_slot(), then free the slot."""
+    try:
+        await _process_batch(batch_id, profile_model, cv_model, image_model, smart_category, image_size, api_keys)
+    finally:
+        release_batch_slot()
+
+
+async def _process_batch(batch_id: str, profile_model: Optional[str], cv_model: Optional[str], image_model: Optional[str], smart_category: bool = False, image_size: int = 100, api_keys: dict = None):
     """
     Execute the OPTIMIZED PIPELINED Generation Pipeline.
     
@@ -48,23 +114,61 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
     tasks = batch.tasks
     batch_start = time.time()
     
-    # OPTIMIZED: Increased from 5 to 10 for better throughput
-    # OpenRouter supports ~50 req/min, Krea supports concurrent jobs
-    global_semaphore = asyncio.Semaphore(10)
+    task_starts: dict[str, float] = {}
+    avatar_jobs: dict[str, asyncio.Task] = {}
+    # Bounds how many avatars Phase 1 starts ahead of Stage 2
+    avatar_slots = asyncio.Semaphore(IMG_CONCURRENCY)
+    
+    async def phase3_image(task: Task):
+        """Phase 3: Generate Avatar Image.
+        
+        Only needs the task's own attributes (create_batch already resolved
+        "any" to concrete values), so it is started alongside Phase 1.
+        """
+        async with img_semaphore:
+            try:
+                image_path, used_prompt = await generate_avatar(
+                    gender=task.gender,
+                    ethnicity=task.ethnicity,
+                    age_range=str(task.age_range),
+                    origin=task.origin,
+                    role=task.role,
+                    model=image_model,
+                    filename=f"{task.id}_avatar.jpg",
+                    api_key=api_keys.get('krea') if api_keys else None
+                )
+                
+                # Save prompt for debugging
+                await _save_prompt(f"{task.id}_image_prompt.txt", used_prompt)
+                
+                return image_path, None
+                
+            except Exception as e:
+                return None, str(e)
     
-    async def process_single_task(task: Task):
-        """Process a single task through all 5 phases with optimized parallelization."""
-        task_start = time.time()
+    # ========== STAGE 1 - PHASE 1: PROFILE ==========
+    async def stage_profile(task: Task) -> bool:
+        """Phase 1: Invent the unique profile. Returns False if the task failed."""
+        task_starts[task.id] = time.time()
+        
+        # Phase 3 doesn't depend on the profile - overlap the avatar with Phase 1
+        # while an image slot is free; otherwise Stage 2 starts it instead
+        if not avatar_slots.locked():
+            await avatar_slots.acquire()
+            task.subtasks[2].status = TaskStatus.RUNNING
+            task.subtasks[2].message = "Generating avatar..."
+            job = asyncio.create_task(phase3_image(task))
+            job.add_done_callback(lambda _: avatar_slots.release())
+            avatar_jobs[task.id] = job
         
-        # ========== PHASE 1: PROFILE ==========
         phase1_start = time.time()
-        async with global_semaphore:
+        async with llm_semaphore:
             try:
-                task.status = TaskStatus.RUNNING
+                task_manager.set_task_status(task, TaskStatus.RUNNING)
                 task.current_subtask_index = 0
                 task.subtasks[0].status = TaskStatus.RUNNING
                 task.subtasks[0].message = "Inventing unique persona..."
-                await task_manager._save_batches()
+                task_manager.mark_dirty(task.batch_id)
                 
                 profile_data, prompt = await generate_profile_data(
                     role=task.role,
@@ -81,20 +185,26 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
                 task.subtasks[0].progress = 100
                 task.progress = 20
                 task.message = f"Profile Created: {profile_data.get('name')}"
-                await task_manager._save_batches()
+                task_manager.mark_dirty(task.batch_id)
                 
                 phase1_time = time.time() - phase1_start
                 print(f"⏱️ Task {task.id} Phase 1: {phase1_time:.1f}s")
                 
             except Exception as e:
                 task.error = str(e)
-                task.status = TaskStatus.ERROR
+                task_manager.set_task_status(task, TaskStatus.ERROR)
                 task.subtasks[0].status = TaskStatus.ERROR
                 print(f"Phase 1 Error Task {task.id}: {e}")
-                return  # Stop this task, but don't affect others
-        
-        # ========== PHASE 2 + PHASE 3: PARALLEL EXECUTION ==========
-        # These phases are INDEPENDENT - both only need profile_data from Phase 1
+                job = avatar_jobs.pop(task.id, None)
+                if job is not None:
+                    job.cancel()
+                return False  # Stop this task, but don't affect others
+        return True
+    
+    # ========== STAGE 2 - PHASE 2 + PHASE 3: PARALLEL EXECUTION ==========
+    async def stage_media(task: Task) -> bool:
+        """Phase 2 + 3: CV content and avatar. Returns False if the task failed."""
+        # Phase 2 needs profile_data; Phase 3 has been running since Phase 1 started
         phase2_3_start = time.time()
         
         p = task.profile_data or {}
@@ -103,14 +213,12 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
         task.current_subtask_index = 1
         task.subtasks[1].status = TaskStatus.RUNNING
         task.subtasks[1].message = "Writing CV content..."
-        task.subtasks[2].status = TaskStatus.RUNNING
-        task.subtasks[2].message = "Generating avatar..."
-        task.status = TaskStatus.GENERATING_CONTENT
-        await task_manager._save_batches()
+        task_manager.set_task_status(task, TaskStatus.GENERATING_CONTENT)
+        task_manager.mark_dirty(task.batch_id)
         
         async def phase2_cv_content():
             """Phase 2: Generate CV Content"""
-            async with global_semaphore:
+            async with llm_semaphore:
                 try:
                     cv_data, used_prompt = await generate_cv_content_v2(
                         role=p.get('role', task.role),
@@ -127,52 +235,23 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
                     )
                     
                     # Save prompt for debugging
-                    try:
-                        if not PROMPTS_DIR.exists():
-                            PROMPTS_DIR.mkdir(parents=True, exist_ok=True)
-                        path = PROMPTS_DIR / f"{task.id}_cv_prompt.txt"
-                        with open(path, "w", encoding="utf-8") as f: 
-                            f.write(used_prompt)
-                    except: 
-                        pass
+                    await _save_prompt(f"{task.id}_cv_prompt.txt", used_prompt)
                     
                     return cv_data, None
                     
                 except Exception as e:
                     return None, str(e)
         
-        async def phase3_image():
-            """Phase 3: Generate Avatar Image"""
-            async with global_semaphore:
-                try:
-                    image_path, used_prompt = await generate_avatar(
-                        gender=p.get('gender', task.gender),
-                        ethnicity=p.get('ethnicity', task.ethnicity),
-                        age_range=str(p.get('age', task.age_range)),
-                        origin=p.get('origin', task.origin),
-                        role=p.get('role', task.role),
-                        model=image_model,
-                        filename=f"{task.id}_avatar.jpg",
-                        api_key=api_keys.get('krea') if api_keys else None
-                    )
-                    
-                    # Save prompt for debugging
-                    try:
-                        path = PROMPTS_DIR / f"{task.id}_image_prompt.txt"
-                        with open(path, "w", encoding="utf-8") as f: 
-                            f.write(used_prompt)
-                    except: 
-                        pass
-                    
-                    return image_path, None
-                    
-                except Exception as e:
-                    return None, str(e)
+        avatar_job = avatar_jobs.pop(task.id, None)
+        if avatar_job is None:
+            task.subtasks[2].status = TaskStatus.RUNNING
+            task.subtasks[2].message = "Generating avatar..."
+            avatar_job = phase3_image(task)
         
         # RUN BOTH PHASES IN PARALLEL
         results = await asyncio.gather(
             phase2_cv_content(),
-            phase3_image(),
+            avatar_job,
             return_exceptions=True
         )
         
@@ -183,18 +262,18 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
         cv_result = results[0]
         if isinstance(cv_result, Exception):
             task.error = str(cv_result)
-            task.status = TaskStatus.ERROR
+            task_manager.set_task_status(task, TaskStatus.ERROR)
             task.subtasks[1].status = TaskStatus.ERROR
             print(f"Phase 2 Error Task {task.id}: {cv_result}")
-            return
+            return False
         
         cv_data, cv_error = cv_result
         if cv_error:
             task.error = cv_error
-            task.status = TaskStatus.ERROR
+            task_manager.set_task_status(task, TaskStatus.ERROR)
             task.subtasks[1].status = TaskStatus.ERROR
             print(f"Phase 2 Error Task {task.id}: {cv_error}")
-            return
+            return False
         
         task.cv_data = cv_data
         task.subtasks[1].status = TaskStatus.COMPLETE
@@ -218,10 +297,10 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
                 task.subtasks[2].message = "Fallback avatar used"
             except Exception as fallback_e:
                 task.error = f"Image Gen Failed: {image_result} | Fallback Failed: {fallback_e}"
-                task.status = TaskStatus.ERROR
+                task_manager.set_task_status(task, TaskStatus.ERROR)
                 task.subtasks[2].status = TaskStatus.ERROR
                 print(f"CRITICAL: Phase 3 completely failed Task {task.id}: {fallback_e}")
-                return
+                return False
         else:
             image_path, image_error = image_result
             if image_error:
@@ -237,47 +316,42 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
                     task.subtasks[2].message = f"Fallback. Error: {image_error[:50]}..."
                 except Exception as fallback_e:
                     task.error = f"Image Gen Failed: {image_error} | Fallback Failed: {fallback_e}"
-                    task.status = TaskStatus.ERROR
+                    task_manager.set_task_status(task, TaskStatus.ERROR)
                     task.subtasks[2].status = TaskStatus.ERROR
-                    return
+                    return False
             else:
                 task.image_path = image_path
         
         task.subtasks[2].status = TaskStatus.COMPLETE
         task.subtasks[2].progress = 100
         task.progress = 80
-        await task_manager._save_batches()
-        
-        # ========== PHASE 4 & 5: HTML + PDF ==========
+        task_manager.mark_dirty(task.batch_id)
+        return True
+    
+    # ========== STAGE 3 - PHASE 4 & 5: HTML + PDF ==========
+    async def stage_render(task: Task) -> bool:
+        """Phase 4 + 5: Render HTML and print the PDF. Returns False if the task failed."""
+        p = task.profile_data or {}
         phase4_5_start = time.time()
         try:
             task.current_subtask_index = 3
             task.subtasks[3].status = TaskStatus.RUNNING
             task.subtasks[3].message = "Assembling HTML..."
-            await task_manager._save_batches()
+            task_manager.mark_dirty(task.batch_id)
             
             import random
             
-            safe_name = p.get("name", "CV").replace(" ", "_")
-            safe_name = "".join([c for c in safe_name if c.isalnum() or c in ('_','-')])
-            safe_role = p.get("role", "Role").replace(" ", "_").replace("/", "-")
-            safe_role = "".join([c for c in safe_role if c.isalnum() or c in ('_','-')])
+            safe_name = _sanitize_filename_part(p.get("name", "CV"))
+            safe_role = _sanitize_filename_part(p.get("role", "Role").replace("/", "-"))
             
             filename = f"{task.id[:8]}__{safe_name}__{safe_role}.html"
             
             task.subtasks[3].progress = 50
             task.subtasks[3].message = "Rendering HTML template..."
-            await task_manager._save_batches()
+            task_manager.mark_dirty(task.batch_id)
             
             # Generate consistent sidebar color for both HTML and PDF
-            sidebar_colors = [
-                '#E3F2FD', '#D1EAED', '#D4E6F1', '#EBF5FB', # Blues
-                '#E8F5E9', '#DCE6D9', '#EAFAF1',            # Greens
-                '#FAF2D3', '#FDEBD0', '#E6DDCF',            # Warm
-                '#F4ECF7', '#E8DAEF', '#FADBD8',            # Rose/Purple
-                '#E5E7E9', '#EAEDED', '#F2F3F4', '#D7DBDD'  # Neutrals
-            ]
-            sidebar_color = random.choice(sidebar_colors)
+            sidebar_color = random.choice(SIDEBAR_COLORS)
             
             result = await render_cv_pdf(
                 task.cv_data, 
@@ -294,6 +368,7 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
             
             html_path, pdf_path = result
             task.html_path = html_path
+            file_registry.add(html_path)
             
             task.subtasks[3].status = TaskStatus.COMPLETE
             task.subtasks[3].progress = 100
@@ -304,7 +379,7 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
             task.subtasks[4].status = TaskStatus.RUNNING
             task.subtasks[4].progress = 50
             task.subtasks[4].message = "Generating PDF with selectable text..."
-            await task_manager._save_batches()
+            task_manager.mark_dirty(task.batch_id)
             
             if pdf_path and pdf_path.endswith('.pdf') and Path(pdf_path).exists() and Path(pdf_path).stat().st_size > 0:
                 task.pdf_path = pdf_path
@@ -319,25 +394,67 @@ async def process_batch(batch_id: str, profile_model: Optional[str], cv_model: O
                 task.error = error_msg
                 print(f"ERROR: {error_msg}")
             
-            task.status = TaskStatus.COMPLETE
+            task_manager.set_task_status(task, TaskStatus.COMPLETE)
             task.progress = 100
             task.message = "Complete"
-            await task_manager._save_batches()
+            task_manager.mark_dirty(task.batch_id)
             
             phase4_5_time = time.time() - phase4_5_start
-            total_time = time.time() - task_start
+            total_time = time.time() - task_starts.pop(task.id, phase4_5_start)
             print(f"⏱️ Task {task.id} Phase 4+5: {phase4_5_time:.1f}s | TOTAL: {total_time:.1f}s")
             
         except Exception as e:
             task.error = str(e)
-            task.status = TaskStatus.ERROR
+            task_manager.set_task_status(task, TaskStatus.ERROR)
             print(f"Phase 4/5 Error Task {task.id}: {e}")
             import traceback
             traceback.print_exc()
+            return False
+        return True
+    
+    # Stage pipeline: each stage has its own queue and worker pool, so a slow LLM
+    # response only holds a profile/content worker while finished profiles keep
+    # flowing into avatar generation and rendering (no head-of-line blocking).
+    # At most BATCH_WORKERS tasks are in each stage; the rest wait in the queues.
+    num_workers = min(BATCH_WORKERS, len(tasks))
+    stages = [stage_profile, stage_media, stage_render]
+    queues: list[asyncio.Queue] = [asyncio.Queue() for _ in stages]
+    for t in tasks:
+        queues[0].put_nowait(t)
+    for _ in range(num_workers):
+        queues[0].put_nowait(None)  # Sentinel: no more tasks for this stage
+    
+    async def worker(stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        while True:
+            task = await inbox.get()
+            if task is None:
+                return
+            try:
+                ok = await stage(task)
+            except Exception as e:
+                ok = False
+                task.error = str(e)
+                task_manager.set_task_status(task, TaskStatus.ERROR)
+                print(f"Unhandled Error Task {task.id}: {e}")
+            if ok and outbox is not None:
+                outbox.put_nowait(task)
+    
+    async def run_stage(index: int):
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        await asyncio.gather(*[worker(stages[index], queues[index], outbox) for _ in range(num_workers)])
+        # Stage drained: let the next stage's workers finish once its queue empties
+        if outbox is not None:
+            for _ in range(num_workers):
+                outbox.put_nowait(None)
     
-    # Launch ALL tasks concurrently - each runs through its full pipeline
-    print(f"=== STARTING OPTIMIZED PIPELINED GENERATION ({len(tasks)} tasks, semaphore=10) ===")
-    await asyncio.gather(*[process_single_task(t) for t in tasks])
+    print(f"=== STARTING OPTIMIZED PIPELINED GENERATION ({len(tasks)} tasks, workers={num_workers}/stage, llm={LLM_CONCURRENCY}, img={IMG_CONCURRENCY}) ===")
+    try:
+        await asyncio.gather(*[run_stage(i) for i in range(len(stages))])
+    finally:
+        # Avatars started for tasks that never reached Stage 2
+        for job in avatar_jobs.values():
+            job.cancel()
+        avatar_jobs.clear()
     
     total_batch_time = time.time() - batch_start
     print(f"=== BATCH COMPLETE in {total_batch_time:.1f}s ({total_batch_time/len(tasks):.1f}s per CV) ===")
@@ -4,18 +4,29 @@ Supports multiple image generation models with different speeds and compute cost
 """
 
 import asyncio
+import functools
+import logging
+import itertools
 import os
-import uuid
+import random
+import re
+import secrets
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional, Tuple
 import httpx
+import aiofiles
 from dotenv import load_dotenv
 
 # Get paths - CRITICAL: load .env from backend directory
 BACKEND_DIR = Path(__file__).parent.parent.parent
 ENV_PATH = BACKEND_DIR / ".env"
 load_dotenv(dotenv_path=ENV_PATH)
-print(f"DEBUG KREA: Loading .env from: {ENV_PATH} (exists: {ENV_PATH.exists()})")
+
+# Child of the "app" logger from logging_config (level from LOG_LEVEL). Lazy
+# %-formatting means per-call/per-poll DEBUG lines cost nothing when disabled.
+logger = logging.getLogger("app.krea")
+logger.debug("Loading .env from: %s (exists: %s)", ENV_PATH, ENV_PATH.exists())
 
 # Output directory for avatars
 OUTPUT_DIR = BACKEND_DIR / "output"
@@ -24,14 +35,77 @@ AVATARS_DIR = OUTPUT_DIR / "avatars"
 # Detect Vercel environment
 IS_VERCEL = os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV') is not None
 
+# Read once at import; a key passed per request still takes precedence
+KREA_API_KEY = os.getenv("KREA_API_KEY", "")
+DEFAULT_IMAGE_MODEL = os.getenv("DEFAULT_IMAGE_MODEL", "bfl/flux-1-dev")
+
 if not IS_VERCEL:
     AVATARS_DIR.mkdir(parents=True, exist_ok=True)
 ASSETS_DIR = AVATARS_DIR # Backward compatibility wrapper
 
+# Names for avatars saved without an explicit filename: a random per-process
+# prefix plus a counter can't collide within a process (8 random hex chars could)
+_AVATAR_NAME_PREFIX = secrets.token_hex(3)
+_avatar_name_counter = itertools.count()
+
+def _new_avatar_filename() -> str:
+    return f"avatar_{_AVATAR_NAME_PREFIX}{next(_avatar_name_counter):06x}.jpg"
+
 # Krea API Configuration - Per official docs (Jan 2026)
 KREA_API_BASE = "https://api.krea.ai"
 KREA_JOBS_URL = "https://api.krea.ai/jobs"
 
+# Job polling schedule (seconds)
+KREA_POLL_MIN_DELAY = 0.5
+KREA_POLL_MAX_DELAY = 4.0
+KREA_POLL_TIMEOUT = 60.0
+
+# Job submission retries for throttling / transient server errors
+KREA_SUBMIT_ATTEMPTS = 3
+KREA_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+KREA_RETRY_MAX_DELAY = 30.0
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff with jitter, or the server's Retry-After when given."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), KREA_RETRY_MAX_DELAY)
+        except ValueError:
+            pass  # HTTP-date form - fall back to our own schedule
+    return min(KREA_RETRY_MAX_DELAY, 2 ** attempt) + random.random()
+
+# Moving average of job completion time per model, used to time the first poll
+_completion_ema: dict[str, float] = {}
+
+def _record_completion_time(model_id: str, seconds: float, alpha: float = 0.3):
+    previous = _completion_ema.get(model_id)
+    _completion_ema[model_id] = seconds if previous is None else alpha * seconds + (1 - alpha) * previous
+
+# =============================================================================
+# PERFORMANCE OPTIMIZATION: Global HTTP Client Pool
+# One keep-alive pool for all avatars instead of a new client (and TLS
+# handshake) per call. The API key is sent per request since users can supply
+# their own.
+# =============================================================================
+_http_client: httpx.AsyncClient | None = None
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Get or create global Krea HTTP client with connection pooling."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the global Krea HTTP client (app shutdown)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
 # Available models with their properties - VERIFIED in Krea OpenAPI spec
 KREA_MODELS = {
     "bfl/flux-1-dev": {
@@ -140,6 +214,92 @@ KREA_MODELS = {
     }
 }
 
+# Map simple names to correct API paths (Provider/Model-ID format)
+# Based on user feedback and Krea API standards
+# Built once at import (read-only) instead of on every generate_avatar call
+MODEL_PATH_MAP = MappingProxyType({
+    # Flux Families (BFL) - Verified in OpenAPI spec
+    "flux": "bfl/flux-1-dev",
+    "bfl/flux-1-dev": "bfl/flux-1-dev",
+    "flux-1.1-pro": "bfl/flux-1.1-pro",
+    "flux-1.1-pro-ultra": "bfl/flux-1.1-pro-ultra",
+    "flux-kontext": "bfl/flux-1-kontext-dev",
+    "bfl/flux-1-kontext-dev": "bfl/flux-1-kontext-dev",
+    
+    # ByteDance - Verified in OpenAPI spec
+    "seedream-3": "bytedance/seedream-3",
+    "seedream-4": "bytedance/seedream-4",
+    
+    # Google - Verified in OpenAPI spec
+    "imagen-3": "google/imagen-3",
+    "imagen-4-fast": "google/imagen-4-fast",
+    "imagen-4": "google/imagen-4",
+    "imagen-4-ultra": "google/imagen-4-ultra",
+    "nano-banana-pro": "google/nano-banana-pro",
+    "nano-banana": "google/nano-banana",
+    
+    # Ideogram - Verified in OpenAPI spec
+    "ideogram-3": "ideogram/ideogram-3",
+    "ideogram-2-turbo": "ideogram/ideogram-2-turbo",
+    
+    # OpenAI - Verified in OpenAPI spec
+    "chatgpt-image": "openai/gpt-image",
+    "gpt-image": "openai/gpt-image",
+})
+
+
+# =============================================================================
+# PERFORMANCE OPTIMIZATION: Template Caching
+# The image prompt template is read from disk once instead of on every avatar
+# =============================================================================
+IMAGE_TEMPLATE_PATH = BACKEND_DIR / "prompts" / "image_prompt_template.txt"
+_image_template: Optional[str] = None
+
+def _get_image_template() -> Optional[str]:
+    """Image prompt template text, or None if the file is missing (not cached)."""
+    global _image_template
+    if _image_template is None and IMAGE_TEMPLATE_PATH.exists():
+        with open(IMAGE_TEMPLATE_PATH, "r", encoding="utf-8") as f:
+            _image_template = f.read()
+        logger.debug("Cached image prompt template from %s", IMAGE_TEMPLATE_PATH)
+    return _image_template
+
+
+# Seniority words dropped from the role before it goes into the image prompt
+_ROLE_SENIORITY_RE = re.compile(
+    r'\bsenior\b|\blead\b|\bprincipal\b|\bchief\b|\bhead\s*of\b|\bexecutive\b'
+    r'|\bvp\b|\bdirector\b|\bmanager\b|\bsr\.?\b|\bjr\.?\b',
+    re.IGNORECASE
+)
+
+# Role keyword -> (context, base style); first matching category wins
+_ROLE_STYLES = (
+    (("designer", "creative", "artist", "ux", "ui", "art", "architect"),
+     "creative professional, stylish modern attire", "artistic lighting, 8k, sharp focus, modern vibe"),
+    (("developer", "engineer", "software", "tech", "data", "programmer"),
+     "tech professional, smart-casual attire", "clean lighting, 8k, modern aesthetic"),
+    (("teacher", "educator", "professor", "trainer"),
+     "educator, smart professional attire", "warm lighting, 8k, approachable"),
+    (("medical", "doctor", "nurse", "health", "clinical"),
+     "healthcare professional, medical attire", "clean clinical lighting, 8k"),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _role_context(role: str) -> Tuple[str, str, str]:
+    """Cleaned role title plus its (context, base_style). Batches reuse a few roles."""
+    cleaned_role = ' '.join(_ROLE_SENIORITY_RE.sub('', role).split()).strip()
+    
+    if len(cleaned_role) < 3:
+        cleaned_role = "Professional"
+    else:
+        cleaned_role = cleaned_role.title()
+    
+    role_lower = cleaned_role.lower()
+    for keywords, context, base_style in _ROLE_STYLES:
+        if any(k in role_lower for k in keywords):
+            return cleaned_role, context, base_style
+    return cleaned_role, "modern casual-professional style", "high quality, 8k, photorealistic"
 
 
 def get_avatar_prompt(gender: str, ethnicity: str, age_range: str, role: str = "Professional") -> str:
@@ -166,44 +326,8 @@ def get_avatar_prompt(gender: str, ethnicity: str, age_range: str, role: str = "
     else:
         age_val = age_range
         
-    # --- CLEAN ROLE LOGIC ---
-    import re
-    forbidden_patterns = [
-        r'\bsenior\b', r'\blead\b', r'\bprincipal\b', r'\bchief\b', 
-        r'\bhead\s*of\b', r'\bexecutive\b', r'\bvp\b', r'\bdirector\b',
-        r'\bmanager\b', r'\bsr\.?\b', r'\bjr\.?\b'
-    ]
-    
-    cleaned_role = role
-    for pattern in forbidden_patterns:
-        cleaned_role = re.sub(pattern, '', cleaned_role, flags=re.IGNORECASE)
-    
-    cleaned_role = ' '.join(cleaned_role.split()).strip()
-    
-    if len(cleaned_role) < 3:
-        cleaned_role = "Professional"
-    else:
-        cleaned_role = cleaned_role.title()
-        
-    # --- DYNAMIC STYLE LOGIC WITH RANDOMNESS ---
-    role_lower = cleaned_role.lower()
-    
-    # Base context based on role category
-    if any(k in role_lower for k in ["designer", "creative", "artist", "ux", "ui", "art", "architect"]):
-        context = "creative professional, stylish modern attire"
-        base_style = "artistic lighting, 8k, sharp focus, modern vibe"
-    elif any(k in role_lower for k in ["developer", "engineer", "software", "tech", "data", "programmer"]):
-        context = "tech professional, smart-casual attire"
-        base_style = "clean lighting, 8k, modern aesthetic"
-    elif any(k in role_lower for k in ["teacher", "educator", "professor", "trainer"]):
-        context = "educator, smart professional attire"
-        base_style = "warm lighting, 8k, approachable"
-    elif any(k in role_lower for k in ["medical", "doctor", "nurse", "health", "clinical"]):
-        context = "healthcare professional, medical attire"
-        base_style = "clean clinical lighting, 8k"
-    else:
-        context = "modern casual-professional style"
-        base_style = "high quality, 8k, photorealistic"
+    # --- CLEAN ROLE + ROLE-BASED STYLE (deterministic, memoized per role) ---
+    cleaned_role, context, base_style = _role_context(role)
     
     # ========== DYNAMIC RANDOMIZATION ==========
     # These inject variety so batch images don't look identical
@@ -247,16 +371,12 @@ def get_avatar_prompt(gender: str, ethnicity: str, age_range: str, role: str = "
     # Combine into style modifiers
     style = f"{base_style}, {chosen_lighting}, {chosen_background}"
 
-    # Load from template file
-    template_path = BACKEND_DIR / "prompts" / "image_prompt_template.txt"
+    # Load from template file (read once, then served from memory)
+    template = _get_image_template()
     
-    if not template_path.exists():
+    if template is None:
         # Fallback inline template if file missing
         return f"Natural portrait of a {gender_term}, age {age_val}, {ethnicity_term}, {context}. {style}"
-
-    print(f"DEBUG: Loading external Image template from {template_path}")
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
         
     # Replace placeholders
     prompt = template.replace("{{gender_term}}", gender_term)
@@ -269,32 +389,29 @@ def get_avatar_prompt(gender: str, ethnicity: str, age_range: str, role: str = "
     prompt += f" {chosen_framing}."
     
     # DEBUG: Log what we're sending
-    print("="*60)
-    print("DEBUG IMAGE PROMPT PARAMETERS:")
-    print(f"  Gender: {gender} -> {gender_term}")
-    print(f"  Age: {age_range} -> {age_val}")
-    print(f"  Ethnicity: {ethnicity} -> {ethnicity_term}")
-    print(f"  Role (Raw): {role}")
-    print(f"  Role (Cleaned): {cleaned_role}")
-    print(f"  Context: {context}")
-    print(f"  Background: {chosen_background}")
-    print(f"  Lighting: {chosen_lighting}")
-    print(f"  Framing: {chosen_framing}")
-    print(f"  Prompt Length: {len(prompt)} chars")
-    print("="*60)
+    logger.debug(
+        "Image prompt parameters: gender=%s -> %s, age=%s -> %s, ethnicity=%s -> %s, "
+        "role=%r (cleaned %r), context=%s, background=%s, lighting=%s, framing=%s, length=%d chars",
+        gender, gender_term, age_range, age_val, ethnicity, ethnicity_term,
+        role, cleaned_role, context, chosen_background, chosen_lighting, chosen_framing, len(prompt)
+    )
     
     return prompt
 
 
+# KREA_MODELS never changes at runtime, so /models serves a prebuilt list
+_AVAILABLE_MODELS = [
+    {
+        "id": model_id,
+        **model_info
+    }
+    for model_id, model_info in KREA_MODELS.items()
+]
+
+
 def get_available_models() -> list[dict]:
     """Return list of available image models with their properties."""
-    return [
-        {
-            "id": model_id,
-            **model_info
-        }
-        for model_id, model_info in KREA_MODELS.items()
-    ]
+    return _AVAILABLE_MODELS
 
 
 async def generate_avatar(
@@ -317,203 +434,196 @@ async def generate_avatar(
         role: Job role for context styling
         model: Krea model ID
     """
-    api_key = api_key or os.getenv("KREA_API_KEY", "")
+    api_key = api_key or KREA_API_KEY
     
     # Debug logging
-    print(f"DEBUG KREA: API Key loaded: {'YES (' + api_key[:8] + '...)' if api_key and len(api_key) > 8 else 'NO/EMPTY'}")
+    logger.debug("API Key loaded: %s", "YES" if api_key and len(api_key) > 8 else "NO/EMPTY")
     
     if not api_key or api_key == "your-krea-api-key-here":
         error_msg = "ERROR: KREA_API_KEY not configured in backend/.env - Cannot generate avatar without real API key"
-        print(error_msg)
         raise ValueError(error_msg)
     
     # Use provided model or default - map old names to new API paths
-    model_input = model or os.getenv("DEFAULT_IMAGE_MODEL", "bfl/flux-1-dev")
-    
-    # Map simple names to correct API paths (Provider/Model-ID format)
-    # Based on user feedback and Krea API standards
-    MODEL_PATH_MAP = {
-        # Flux Families (BFL) - Verified in OpenAPI spec
-        "flux": "bfl/flux-1-dev",
-        "bfl/flux-1-dev": "bfl/flux-1-dev",
-        "flux-1.1-pro": "bfl/flux-1.1-pro",
-        "flux-1.1-pro-ultra": "bfl/flux-1.1-pro-ultra",
-        "flux-kontext": "bfl/flux-1-kontext-dev",
-        "bfl/flux-1-kontext-dev": "bfl/flux-1-kontext-dev",
-        
-        # ByteDance - Verified in OpenAPI spec
-        "seedream-3": "bytedance/seedream-3",
-        "seedream-4": "bytedance/seedream-4",
-        
-        # Google - Verified in OpenAPI spec
-        "imagen-3": "google/imagen-3",
-        "imagen-4-fast": "google/imagen-4-fast",
-        "imagen-4": "google/imagen-4",
-        "imagen-4-ultra": "google/imagen-4-ultra",
-        "nano-banana-pro": "google/nano-banana-pro",
-        "nano-banana": "google/nano-banana",
-        
-        # Ideogram - Verified in OpenAPI spec
-        "ideogram-3": "ideogram/ideogram-3",
-        "ideogram-2-turbo": "ideogram/ideogram-2-turbo",
-        
-        # OpenAI - Verified in OpenAPI spec
-        "chatgpt-image": "openai/gpt-image",
-        "gpt-image": "openai/gpt-image",
-    }
+    model_input = model or DEFAULT_IMAGE_MODEL
     
     # Clean fallback: If exact match exists in map, use it. Else try to construct provider prefix if missing?
     # For now, rely on MAP or raw string
     model_id = MODEL_PATH_MAP.get(model_input, model_input)
     
-    print(f"DEBUG KREA: Using model: {model_id}")
+    logger.debug("Using model: %s", model_id)
     
     prompt = get_avatar_prompt(gender, ethnicity, age_range, role)
     
     try:
         # Construct API URL per Krea docs
         api_url = f"{KREA_API_BASE}/generate/image/{model_id}"
-        print(f"DEBUG KREA: Calling {api_url}")
+        logger.debug("Calling %s", api_url)
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            # Step 1: Create generation job
-            # Build request body based on model requirements (from OpenAPI spec)
-            request_body = {
-                "prompt": prompt,
-                "width": 512,
-                "height": 512
-            }
+        client = await get_http_client()
+        # Step 1: Create generation job
+        # Build request body based on model requirements (from OpenAPI spec)
+        request_body = {
+            "prompt": prompt,
+            "width": 512,
+            "height": 512
+        }
+        
+        # Model-specific parameters from OpenAPI spec
+        if "seedream-3" in model_id:
+            # Seedream-3 requires specific model parameter
+            request_body["model"] = "seedream-3-0-t2i-250415"
+        elif "seedream-4" in model_id:
+            # Seedream-4 requires width and height (already included)
+            pass
+        elif "flux" in model_id.lower():
+            # Flux models support steps
+            request_body["steps"] = 25
+        # Other models use default prompt/width/height
+        
+        # Retry 429/5xx and connection errors so transient throttling doesn't
+        # end in a mock avatar
+        for attempt in range(KREA_SUBMIT_ATTEMPTS):
+            last_attempt = attempt == KREA_SUBMIT_ATTEMPTS - 1
+            try:
+                response = await client.post(
+                    api_url,
+                    headers={
+                        "Authorization": f"Bearer {api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json=request_body
+                )
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                delay = _retry_delay(attempt)
+                logger.warning("Krea submit failed (%s) - retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                continue
             
-            # Model-specific parameters from OpenAPI spec
-            if "seedream-3" in model_id:
-                # Seedream-3 requires specific model parameter
-                request_body["model"] = "seedream-3-0-t2i-250415"
-            elif "seedream-4" in model_id:
-                # Seedream-4 requires width and height (already included)
-                pass
-            elif "flux" in model_id.lower():
-                # Flux models support steps
-                request_body["steps"] = 25
-            # Other models use default prompt/width/height
+            if response.status_code in KREA_RETRY_STATUSES and not last_attempt:
+                delay = _retry_delay(attempt, response.headers.get("retry-after"))
+                logger.warning("Krea API %s - retrying in %.1fs", response.status_code, delay)
+                await asyncio.sleep(delay)
+                continue
+            break
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Initial response %s: %s", response.status_code, response.text[:500])
+        
+        if response.status_code != 200:
+            error_msg = f"Krea API error: {response.status_code} - {response.text[:300]}"
+            raise RuntimeError(error_msg)
+        
+        result = response.json()
+        job_id = result.get("job_id")
+        
+        if not job_id:
+            error_msg = f"Krea API did not return job_id: {result}"
+            raise RuntimeError(error_msg)
+        
+        logger.debug("Job created: %s", job_id)
+        
+        # Step 2: OPTIMIZED Poll for completion with intelligent backoff
+        # Fast initial polls (image might be ready quickly), then slow down
+        # Exponential backoff (x1.7, capped at KREA_POLL_MAX_DELAY). The first wait
+        # is based on how long this model usually takes, so fast models aren't
+        # polled pointlessly and slow ones aren't polled too early.
+        import time
+        poll_start = time.time()
+        typical = _completion_ema.get(model_id)
+        delay = max(KREA_POLL_MIN_DELAY, 0.7 * typical) if typical else KREA_POLL_MIN_DELAY
+        poll_num = -1
+        
+        while time.time() - poll_start < KREA_POLL_TIMEOUT:
+            poll_num += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.7, KREA_POLL_MAX_DELAY)
             
-            response = await client.post(
-                api_url,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=request_body
-
+            job_response = await client.get(
+                f"{KREA_JOBS_URL}/{job_id}",
+                headers={"Authorization": f"Bearer {api_key}"}
             )
             
-            print(f"DEBUG KREA: Initial response status: {response.status_code}")
-            print(f"DEBUG KREA: Initial response: {response.text[:500]}")
-            
-            if response.status_code != 200:
-                error_msg = f"Krea API error: {response.status_code} - {response.text[:300]}"
-                print(f"ERROR: {error_msg}")
-                raise RuntimeError(error_msg)
+            # Honor the server's hint on when to ask again
+            retry_after = job_response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    delay = min(max(float(retry_after), KREA_POLL_MIN_DELAY), KREA_POLL_MAX_DELAY)
+                except ValueError:
+                    pass
             
-            result = response.json()
-            job_id = result.get("job_id")
+            if job_response.status_code != 200:
+                logger.debug("Poll %d - status %s", poll_num + 1, job_response.status_code)
+                continue
             
-            if not job_id:
-                error_msg = f"Krea API did not return job_id: {result}"
-                print(f"ERROR: {error_msg}")
-                raise RuntimeError(error_msg)
+            job_data = job_response.json()
+            status = job_data.get("status", "")
             
-            print(f"DEBUG KREA: Job created: {job_id}")
-            
-            # Step 2: OPTIMIZED Poll for completion with intelligent backoff
-            # Fast initial polls (image might be ready quickly), then slow down
-            poll_delays = [0.5, 0.5, 1.0, 1.0, 1.5, 1.5, 2.0, 2.0, 2.0, 2.0, 
-                          2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0,
-                          3.0, 3.0, 3.0, 3.0, 3.0]  # Total: ~45s max wait
-            
-            import time
-            poll_start = time.time()
-            
-            for poll_num, delay in enumerate(poll_delays):
-                await asyncio.sleep(delay)
-                
-                job_response = await client.get(
-                    f"{KREA_JOBS_URL}/{job_id}",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
+            if job_data.get("completed_at"):
+                poll_time = time.time() - poll_start
+                logger.debug("Poll %d - COMPLETED in %.1fs", poll_num + 1, poll_time)
+                _record_completion_time(model_id, poll_time)
                 
-                if job_response.status_code != 200:
-                    print(f"DEBUG KREA: Poll {poll_num+1} - status {job_response.status_code}")
-                    continue
-                
-                job_data = job_response.json()
-                status = job_data.get("status", "")
-                
-                if job_data.get("completed_at"):
-                    poll_time = time.time() - poll_start
-                    print(f"DEBUG KREA: Poll {poll_num+1} - COMPLETED in {poll_time:.1f}s")
-                    
-                    if status == "completed":
-                        # Get image URL from result
-                        urls = job_data.get("result", {}).get("urls", [])
-                        if urls:
-                            image_url = urls[0]
-                            print(f"DEBUG KREA: Image ready: {image_url}")
-                            
-                            # Download and save the image
-                            img_response = await client.get(image_url)
+                if status == "completed":
+                    # Get image URL from result
+                    urls = job_data.get("result", {}).get("urls", [])
+                    if urls:
+                        image_url = urls[0]
+                        logger.debug("Image ready: %s", image_url)
+                        
+                        # Download and save the image - streamed in 64KB chunks so
+                        # concurrent downloads never hold whole images in memory
+                        async with client.stream("GET", image_url) as img_response:
                             if img_response.status_code == 200:
                                 # Use provided filename or generate one
                                 if not filename:
-                                    filename = f"avatar_{uuid.uuid4().hex[:8]}.jpg"
+                                    filename = _new_avatar_filename()
                                     
                                 filepath = AVATARS_DIR / filename
                                 
-                                with open(filepath, 'wb') as f:
-                                    f.write(img_response.content)
+                                # aiofiles keeps the disk writes off the event loop
+                                async with aiofiles.open(filepath, 'wb') as f:
+                                    async for chunk in img_response.aiter_bytes(64 * 1024):
+                                        await f.write(chunk)
                                 
                                 total_time = time.time() - poll_start
-                                print(f"SUCCESS: Avatar generated with {model_id}: {filename} in {total_time:.1f}s")
+                                logger.info("Avatar generated with %s: %s in %.1fs", model_id, filename, total_time)
                                 return str(filepath), prompt
-                    else:
-                        error_msg = f"Krea job failed: {status}"
-                        print(f"ERROR: {error_msg}")
-                        raise RuntimeError(error_msg)
-            
-            poll_time = time.time() - poll_start
-            error_msg = f"Krea API timeout - job did not complete in {poll_time:.0f} seconds"
-            print(f"ERROR: {error_msg}")
-            raise RuntimeError(error_msg)
-            
-    except Exception as e:
-        error_msg = f"Krea API exception: {e}"
-        print(f"ERROR: {error_msg}")
+                else:
+                    error_msg = f"Krea job failed: {status}"
+                    raise RuntimeError(error_msg)
+        
+        poll_time = time.time() - poll_start
+        error_msg = f"Krea API timeout - job did not complete in {poll_time:.0f} seconds"
         raise RuntimeError(error_msg)
+        
+    except Exception as e:
+        # Callers log the failure (and fall back to a mock avatar) - don't log it here too
+        raise RuntimeError(f"Krea API exception: {e}") from e
+
+
+# Mock avatar color palettes for different ethnicities (module-level, immutable)
+MOCK_SKIN_TONES = MappingProxyType({
+    "asian": ("#f5d0b0", "#e8c49a", "#d4a574"),
+    "caucasian": ("#ffe0bd", "#ffcd94", "#eac086"),
+    "african": ("#8d5524", "#6b4423", "#4a3728"),
+    "hispanic": ("#d4a574", "#c68642", "#a67c52"),
+    "middle-eastern": ("#c68642", "#b5651d", "#a0522d"),
+    "any": ("#d4a574", "#e8c49a", "#c68642")
+})
+
+MOCK_BG_COLORS = ("#3498db", "#2ecc71", "#9b59b6", "#e74c3c", "#1abc9c")
 
 
 async def _generate_mock_avatar(gender: str, ethnicity: str) -> str:
     """Generate a mock avatar when API is unavailable."""
     from PIL import Image, ImageDraw
-    import random
-    
-    # Simulate some delay
-    await asyncio.sleep(random.uniform(1, 2))
-    
-    # Color palettes for different ethnicities
-    SKIN_TONES = {
-        "asian": ["#f5d0b0", "#e8c49a", "#d4a574"],
-        "caucasian": ["#ffe0bd", "#ffcd94", "#eac086"],
-        "african": ["#8d5524", "#6b4423", "#4a3728"],
-        "hispanic": ["#d4a574", "#c68642", "#a67c52"],
-        "middle-eastern": ["#c68642", "#b5651d", "#a0522d"],
-        "any": ["#d4a574", "#e8c49a", "#c68642"]
-    }
-    
-    BG_COLORS = ["#3498db", "#2ecc71", "#9b59b6", "#e74c3c", "#1abc9c"]
     
     size = (400, 400)
-    skin_tones = SKIN_TONES.get(ethnicity.lower(), SKIN_TONES["any"])
+    skin_tones = MOCK_SKIN_TONES.get(ethnicity.lower(), MOCK_SKIN_TONES["any"])
     skin_color = random.choice(skin_tones)
-    bg_color = random.choice(BG_COLORS)
+    bg_color = random.choice(MOCK_BG_COLORS)
     
     img = Image.new('RGB', size, bg_color)
     draw = ImageDraw.Draw(img)
@@ -530,8 +640,9 @@ async def _generate_mock_avatar(gender: str, ethnicity: str) -> str:
     # Smile
     draw.arc([160, 140, 240, 180], start=0, end=180, fill="#2c2c2c", width=3)
     
-    filename = f"avatar_{uuid.uuid4().hex[:8]}.jpg"
+    filename = _new_avatar_filename()
     filepath = ASSETS_DIR / filename
-    img.save(str(filepath), 'JPEG', quality=90)
+    # JPEG encoding + disk write in a worker thread, not on the event loop
+    await asyncio.to_thread(img.save, str(filepath), 'JPEG', quality=90)
     
     return str(filepath)
@@ -8,7 +8,9 @@ PERFORMANCE OPTIMIZATIONS:
 """
 
 import os
+import re
 import json
+import orjson  # Fast C parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
 import random
 import asyncio
 from typing import Optional, Tuple
@@ -27,6 +29,11 @@ print(f"DEBUG: Loading .env from: {ENV_PATH} (exists: {ENV_PATH.exists()})")
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
 
+# Read once at import (main.py has loaded .env by now). Per-request keys sent
+# by the UI still take precedence, so a missing key is only an error at call time.
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+DEFAULT_LLM_MODEL = os.getenv("DEFAULT_LLM_MODEL", "google/gemini-2.0-flash-exp:free")
+
 # =============================================================================
 # PERFORMANCE OPTIMIZATION: Global HTTP Client Pool
 # Reuses TCP connections instead of creating new ones per request
@@ -43,6 +50,13 @@ async def get_http_client() -> httpx.AsyncClient:
         )
     return _http_client
 
+async def close_http_client():
+    """Close the global HTTP client (app shutdown)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
 # =============================================================================
 # PERFORMANCE OPTIMIZATION: Template Caching
 # Loads templates once at startup instead of reading from disk every time
@@ -83,7 +97,7 @@ def fetch_openrouter_models() -> dict:
         response = requests.get(OPENROUTER_MODELS_URL, timeout=5)  # Reduced timeout
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             models = {}
             
             # NOTE: Removed openrouter/auto - it selects paid models automatically
@@ -621,16 +635,17 @@ def create_profile_prompt(role: str, gender: str, ethnicity: str, origin: str, a
         age_range=age_range
     )
 
+# Reasoning blocks some models prepend to their answer (dotall: spans newlines)
+_THINK_BLOCK_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
 def clean_json_response(content: str) -> str:
     """
     Robustly clean LLM response to extract valid JSON.
     Handles <think> blocks, code fences, and extra commentary.
     """
-    import re
-    
     # 1. Remove <think> blocks (often used by reasoning models)
-    # Use dotall flag to match across newlines
-    content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
+    if "<think>" in content:
+        content = _THINK_BLOCK_RE.sub('', content)
     
     # 2. Remove standard markdown code fences
     if "```" in content:
@@ -671,11 +686,11 @@ async def generate_profile_data(
     Returns: (profile_data, used_prompt)
     """
     # Use passed API key or fallback to env var
-    _api_key = api_key or os.getenv("OPENROUTER_API_KEY", "")
+    _api_key = api_key or OPENROUTER_API_KEY
     if not _api_key:
         raise ValueError("OPENROUTER_API_KEY not configured")
         
-    model_id = model or os.getenv("DEFAULT_LLM_MODEL", "google/gemini-2.0-flash-exp:free")
+    model_id = model or DEFAULT_LLM_MODEL
     
     prompt = create_profile_prompt(role, gender, ethnicity, origin, age_range)
     
@@ -709,7 +724,7 @@ async def generate_profile_data(
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 try:
                     content = result["choices"][0]["message"]["content"]
                 except (KeyError, IndexError):
@@ -720,7 +735,7 @@ async def generate_profile_data(
                     
                 # Try to parse
                 try:
-                    profile_data = json.loads(content)
+                    profile_data = orjson.loads(content)
                     # Minimal validation
                     if not isinstance(profile_data, dict):
                         raise ValueError("JSON parsed but result is not a dictionary")
@@ -735,7 +750,7 @@ async def generate_profile_data(
                         # Sometimes braces are missing at the very end
                         if content.strip().startswith("{") and not content.strip().endswith("}"):
                             content += "}"
-                            profile_data = json.loads(content)
+                            profile_data = orjson.loads(content)
                             return profile_data, prompt
                     except: pass
                     raise # Re-raise to be caught by outer except
@@ -746,8 +761,7 @@ async def generate_profile_data(
                 print(f"⚠️ WARNING: Model '{model_id}' returned {response.status_code}. Switching to FREE fallback: {fallback_model}")
                 model_id = fallback_model
                 request_payload["model"] = model_id
-                await asyncio.sleep(1)
-                continue
+                continue  # Different model, nothing to back off from
 
             elif response.status_code == 429:
                 wait_time = (2 ** attempt) + 1  # Exponential backoff: 2s, 3s, 5s...
@@ -833,15 +847,21 @@ def create_user_prompt(role: str, expertise: str, age: int, gender: str, ethnici
         communication_style=communication_style
     )
 
+# Built once from the (cached) model dict - it never changes after the first fetch
+_available_llm_models: list[dict] | None = None
+
 def get_available_models() -> list[dict]:
     """Return list of available LLM models with their properties."""
-    return [
-        {
-            "id": model_id,
-            **model_info
-        }
-        for model_id, model_info in LLM_MODELS.items()
-    ]
+    global _available_llm_models
+    if _available_llm_models is None:
+        _available_llm_models = [
+            {
+                "id": model_id,
+                **model_info
+            }
+            for model_id, model_info in LLM_MODELS.items()
+        ]
+    return _available_llm_models
 
 
 async def generate_cv_content_v2(
@@ -865,7 +885,7 @@ async def generate_cv_content_v2(
     role = resolve_role(role)
     
     # Use passed API key or fallback to env var
-    _api_key = api_key or os.getenv("OPENROUTER_API_KEY", "")
+    _api_key = api_key or OPENROUTER_API_KEY
     
     # Debug logging
     print(f"DEBUG: API Key loaded: {'YES (' + _api_key[:8] + '...)' if _api_key and len(_api_key) > 8 else 'NO/EMPTY'}")
@@ -878,7 +898,7 @@ async def generate_cv_content_v2(
         raise ValueError(error_msg)
     
     # Use provided model or default
-    model_id = model or os.getenv("DEFAULT_LLM_MODEL", "google/gemini-2.0-flash-exp:free")
+    model_id = model or DEFAULT_LLM_MODEL
     print(f"DEBUG: Using LLM model: {model_id}")
     
     user_prompt = create_user_prompt(
@@ -960,7 +980,7 @@ async def generate_cv_content_v2(
                 print("DEBUG RESPONSE - (Content could not be printed due to encoding)")
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 
                 if "choices" in result and len(result["choices"]) > 0:
                     try:
@@ -970,7 +990,7 @@ async def generate_cv_content_v2(
                         content = clean_json_response(content)
                         
                         # Parse JSON
-                        cv_data = json.loads(content)
+                        cv_data = orjson.loads(content)
                         
                         # Normalize Data structure for HTML template
                         cv_data = normalize_cv_data(cv_data)
@@ -19,8 +19,10 @@ async def generate_pdf(html_path: str, pdf_path: str):
             file_uri = Path(html_path).absolute().as_uri()
             print(f"Loading URL: {file_uri}")
             
-            await page.goto(file_uri, wait_until="domcontentloaded", timeout=60000)
-            await page.wait_for_timeout(1000)
+            # HTML is self-contained (base64 images); "load" covers the external stylesheets
+            # and document.fonts.ready replaces the old fixed 1s settle delay
+            await page.goto(file_uri, wait_until="load", timeout=60000)
+            await page.evaluate("document.fonts.ready")
             
             print(f"Writing PDF to {pdf_path}")
             await page.pdf(